@@ -3,17 +3,32 @@ Flask后端应用
 提供围棋游戏API
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 from flask_cors import CORS
+import base64
 import uuid
 
 from app.game_manager import game_manager
+from app.go_board import ENGINES, pack_points
 
 app = Flask(__name__,
             template_folder='templates',
             static_folder='static')
 CORS(app)
 
+# 客户端可通过 ?board=packed 或 Accept 头请求紧凑盘面（见 GoBoard.encode）
+PACKED_BOARD_TYPE = 'application/vnd.go-board.packed'
+
+
+def _negotiate_board(result: dict) -> dict:
+    """按客户端要求把结果中的二维盘面换成2位打包的base64字符串"""
+    if 'board' in result and (request.args.get('board') == 'packed' or
+                              PACKED_BOARD_TYPE in request.headers.get('Accept', '')):
+        packed = pack_points(bytes(v for row in result['board'] for v in row))
+        result['board'] = base64.b64encode(packed).decode('ascii')
+        result['board_encoding'] = 'packed'
+    return result
+
 
 @app.route('/')
 def index():
@@ -28,9 +43,13 @@ def new_game():
     difficulty = data.get('difficulty', 'medium')
     size = data.get('size', 19)
     ai_color = data.get('ai_color', 2)  # 2 = 白棋
+    superko = bool(data.get('superko', False))  # 是否启用局面超级劫规则
+    engine = data.get('engine', 'list')
+    if engine not in ENGINES:
+        return jsonify({'error': f'未知的棋盘引擎: {engine}'}), 400
 
     game_id = str(uuid.uuid4())
-    game_info = game_manager.create_game(game_id, difficulty, size, ai_color)
+    game_info = game_manager.create_game(game_id, difficulty, size, ai_color, superko, engine)
 
     return jsonify({
         'success': True,
@@ -38,6 +57,30 @@ def new_game():
     })
 
 
+@app.route('/api/game/import', methods=['POST'])
+def import_game():
+    """从SGF棋谱创建游戏"""
+    data = request.get_json()
+    text = data.get('sgf')
+    if not text:
+        return jsonify({'error': '缺少SGF内容'}), 400
+    engine = data.get('engine', 'list')
+    if engine not in ENGINES:
+        return jsonify({'error': f'未知的棋盘引擎: {engine}'}), 400
+
+    game_id = str(uuid.uuid4())
+    result = game_manager.import_sgf(game_id, text, data.get('difficulty', 'medium'),
+                                     data.get('ai_color', 2), bool(data.get('superko', False)), engine)
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify({
+        'success': True,
+        'game': _negotiate_board(result)
+    })
+
+
 @app.route('/api/game/<game_id>/move', methods=['POST'])
 def make_move(game_id):
     """落子"""
@@ -53,7 +96,7 @@ def make_move(game_id):
     if 'error' in result:
         return jsonify(result), 400
 
-    return jsonify(result)
+    return jsonify(_negotiate_board(result))
 
 
 @app.route('/api/game/<game_id>/ai-move', methods=['POST'])
@@ -64,7 +107,7 @@ def ai_move(game_id):
     if 'error' in result:
         return jsonify(result), 400
 
-    return jsonify(result)
+    return jsonify(_negotiate_board(result))
 
 
 @app.route('/api/game/<game_id>/pass', methods=['POST'])
@@ -75,13 +118,25 @@ def pass_turn(game_id):
     if 'error' in result:
         return jsonify(result), 400
 
-    return jsonify(result)
+    return jsonify(_negotiate_board(result))
+
+
+@app.route('/api/game/<game_id>/undo', methods=['POST'])
+def undo_move(game_id):
+    """悔棋"""
+    result = game_manager.undo_move(game_id)
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(_negotiate_board(result))
 
 
 @app.route('/api/game/<game_id>/valid-moves', methods=['GET'])
 def get_valid_moves(game_id):
-    """获取合法落子位置"""
-    result = game_manager.get_valid_moves(game_id)
+    """获取合法落子位置（?format=bitmask 返回紧凑位掩码）"""
+    bitmask = request.args.get('format') == 'bitmask'
+    result = game_manager.get_valid_moves(game_id, bitmask)
 
     if 'error' in result:
         return jsonify(result), 400
@@ -114,9 +169,8 @@ def explain_move():
 
     # 创建临时AI来获取解释
     from app.go_ai import create_ai
-    temp_board = game['board'].__class__(game['board'].size)
-    temp_board.board = [row[:] for row in game['board'].board]
-    temp_board.current_player = game['board'].current_player
+    # 局面副本：试探落子不影响对局棋盘
+    temp_board = game['board'].snapshot()
 
     temp_ai = create_ai(temp_board, game['ai_color'], game['difficulty'])
 
@@ -142,6 +196,9 @@ def analyze_position(game_id):
     # 创建AI分析器
     ai = AdvancedAI(board, board.current_player, game['difficulty'])
 
+    # 空白区域只标记一次，领地分析和总体评估共用
+    regions = board.analyze_regions()
+
     # 分析双方局势
     analysis = {
         'game_phase': ai.game_phase,
@@ -149,10 +206,11 @@ def analyze_position(game_id):
         'current_player': '黑方' if board.current_player == 1 else '白方',
         'black_strength': _analyze_player_strength(board, 1),
         'white_strength': _analyze_player_strength(board, 2),
-        'territory': _analyze_territory(board),
+        'territory': _analyze_territory(regions),
         'influence': _analyze_influence(board),
+        'ladders': _analyze_ladders(board),
         'recommendations': _get_recommendations(board, ai),
-        'overall_assessment': _get_overall_assessment(board)
+        'overall_assessment': _get_overall_assessment(board, regions)
     }
 
     return jsonify(analysis)
@@ -166,10 +224,13 @@ def get_game_logs(game_id):
         return jsonify({'error': '游戏不存在'}), 404
 
     board = game['board']
+    history = board.move_history
 
-    # 格式化日志
+    # 格式化日志（?since=N 只返回第N手之后的新日志）
+    since = max(0, request.args.get('since', 0, type=int))
     logs = []
-    for i, move in enumerate(board.move_history):
+    for i in range(since, len(history)):
+        move = history[i]
         if move['x'] == -1:  # 虚着
             log_entry = {
                 'number': i + 1,
@@ -196,26 +257,49 @@ def get_game_logs(game_id):
 
     return jsonify({
         'logs': logs,
-        'total_moves': len(board.move_history)
+        'total_moves': len(history)
     })
 
 
+@app.route('/api/game/<game_id>/sgf', methods=['GET'])
+def export_sgf(game_id):
+    """导出SGF棋谱"""
+    result = game_manager.export_sgf(game_id)
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return Response(result['sgf'], mimetype='application/x-go-sgf',
+                    headers={'Content-Disposition': f'attachment; filename={game_id}.sgf'})
+
+
+@app.route('/api/game/<game_id>/review', methods=['GET'])
+def review_position(game_id):
+    """复盘：获取第ply手之后的局面"""
+    ply = request.args.get('ply', type=int)
+    if ply is None:
+        return jsonify({'error': '缺少手数参数ply'}), 400
+
+    result = game_manager.review_position(game_id, ply)
+
+    if 'error' in result:
+        return jsonify(result), 400
+
+    return jsonify(_negotiate_board(result))
+
+
 def _analyze_player_strength(board, player):
     """分析某方棋力"""
     stones = 0
     groups = []
     visited = set()
 
-    for y in range(board.size):
-        for x in range(board.size):
-            if board.board[y][x] == player and (x, y) not in visited:
-                from app.go_ai import AdvancedAI
-                # 创建临时AI实例来使用其方法
-                temp_ai = AdvancedAI(board, player, 'medium')
-                group = temp_ai._get_group(x, y, player)
-                groups.append(len(group))
-                visited.update(group)
-                stones += len(group)
+    for p in board.points:
+        if board.cells[p] == player and p not in visited:
+            group = board.chain_stones(p)
+            groups.append(len(group))
+            visited.update(group)
+            stones += len(group)
 
     avg_group_size = sum(groups) / len(groups) if groups else 0
 
@@ -227,55 +311,25 @@ def _analyze_player_strength(board, player):
     }
 
 
-def _analyze_territory(board):
+def _analyze_territory(regions):
     """分析领地"""
-    black_territory = 0
-    white_territory = 0
-    neutral = 0
-
-    for y in range(board.size):
-        for x in range(board.size):
-            if board.board[y][x] == 0:
-                owner = board._get_territory_owner(x, y)
-                if owner == 1:
-                    black_territory += 1
-                elif owner == 2:
-                    white_territory += 1
-                else:
-                    neutral += 1
-            elif board.board[y][x] == 1:
-                black_territory += 1
-            else:
-                white_territory += 1
+    black_territory = regions['black_stones'] + regions['black_territory']
+    white_territory = regions['white_stones'] + regions['white_territory']
 
     return {
         'black': black_territory,
         'white': white_territory,
-        'neutral': neutral,
+        'neutral': regions['neutral'],
         'black_advantage': black_territory - white_territory
     }
 
 
 def _analyze_influence(board):
     """分析影响力"""
-    black_influence = 0
-    white_influence = 0
-
-    for y in range(board.size):
-        for x in range(board.size):
-            # 计算每个位置的影响力
-            influence_range = 3
-            for dy in range(-influence_range, influence_range + 1):
-                for dx in range(-influence_range, influence_range + 1):
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < board.size and 0 <= ny < board.size:
-                        dist = max(abs(dx), abs(dy))
-                        if dist > 0:
-                            weight = 1 / dist
-                            if board.board[ny][nx] == 1:
-                                black_influence += weight
-                            elif board.board[ny][nx] == 2:
-                                white_influence += weight
+    from app.influence import influence_totals
+
+    # 每个位置的影响力：3路以内的棋子按切比雪夫距离加权（整盘影响力图，按局面缓存）
+    black_influence, white_influence = influence_totals(board)
 
     return {
         'black': round(black_influence, 1),
@@ -284,6 +338,18 @@ def _analyze_influence(board):
     }
 
 
+def _analyze_ladders(board):
+    """分析可被征吃的棋串"""
+    from app.ladder import find_ladders
+
+    return [{
+        'player': '黑方' if ladder['color'] == 1 else '白方',
+        'player_color': ladder['color'],
+        'stones': [{'x': x, 'y': y} for x, y in ladder['stones']],
+        'liberties': ladder['liberties'],
+    } for ladder in find_ladders(board)]
+
+
 def _get_recommendations(board, ai):
     """获取建议"""
     recommendations = []
@@ -304,9 +370,9 @@ def _get_recommendations(board, ai):
     return recommendations
 
 
-def _get_overall_assessment(board):
+def _get_overall_assessment(board, regions=None):
     """总体评估"""
-    black_score, white_score = board.get_score()
+    black_score, white_score = board.get_score(regions)
     diff = black_score - white_score
 
     if diff > 10:
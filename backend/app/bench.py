@@ -0,0 +1,391 @@
+"""
+棋盘引擎性能对比与正确性校验
+在相同的随机对局上比较各引擎 place_stone / is_valid_move / get_valid_moves 的耗时；
+perft统计从种子局面出发d步内可到达的局面数（各引擎必须一致），
+差分模糊测试让两个引擎走同一串随机着手（含悔棋），逐手比对盘面、提子数和打劫点。
+--mcts 在种子局面上按时间预算运行树搜索AI，给出每秒模拟次数，用于估算服务器容量。
+
+用法（在 backend 目录下）：
+    python -m app.bench --size 19 --games 5 --moves 250
+    python -m app.bench --memory      # 报告进行中和空闲对局的常驻内存，空闲对局超出预算时退出码非0
+    python -m app.bench --life        # 死活判断的回归局面，判断错误时退出码非0
+    python -m app.bench --size 9 --perft 3
+    python -m app.bench --size 9 --fuzz 1000000   # 发现不一致时退出码非0
+    python -m app.bench --size 19 --mcts 2        # 树搜索AI每步2秒的每秒模拟次数
+    python -m app.bench --size 19 --mcts 2 --workers 8   # 8个进程根并行
+    加 --json 输出机器可读的结果，便于跟踪趋势
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Tuple
+
+from .go_board import GoBoard, ENGINES
+from .go_ai import create_ai
+
+# 一局19路空闲对局（棋盘 + AI，约120手，超过 IDLE_RELEASE_SECONDS 未访问、棋盘已 release）
+# 允许占用的内存（字节），目标是几KB以内；进行中的对局保留增量结构，不设预算
+MEMORY_BUDGET = {
+    "list": 6 * 1024,
+    "bitboard": 6 * 1024,
+}
+
+Move = Optional[Tuple[int, int]]  # None 表示虚着
+
+
+def random_game(size: int, moves: int, rng: random.Random) -> List[Move]:
+    """生成一局随机对局的着手序列"""
+    board = GoBoard(size)
+    sequence = []
+    for _ in range(moves):
+        valid = board.get_valid_moves()
+        if not valid:
+            board.pass_move()
+            sequence.append(None)
+            continue
+        move = rng.choice(valid)
+        board.place_stone(*move)
+        sequence.append(move)
+    return sequence
+
+
+def replay(engine: str, size: int, sequence: List[Move]) -> Tuple[float, float, GoBoard]:
+    """按着手序列重放一局，返回 (place_stone总耗时, get_valid_moves总耗时, 终局棋盘)"""
+    board = GoBoard(size, engine=engine)
+    place_time = 0.0
+    valid_time = 0.0
+    clock = time.perf_counter
+    for move in sequence:
+        start = clock()
+        board.get_valid_moves()
+        valid_time += clock() - start
+        if move is None:
+            board.pass_move()
+            continue
+        start = clock()
+        board.place_stone(*move)
+        place_time += clock() - start
+    return place_time, valid_time, board
+
+
+def time_is_valid_move(engine: str, size: int, sequence: List[Move], stride: int = 10) -> Tuple[float, int]:
+    """每隔stride手对全盘所有点调用一次 is_valid_move，返回 (总耗时, 调用次数)"""
+    board = GoBoard(size, engine=engine)
+    coords = [(x, y) for y in range(size) for x in range(size)]
+    clock = time.perf_counter
+    total = 0.0
+    calls = 0
+    for ply, move in enumerate(sequence):
+        if ply % stride == 0:
+            start = clock()
+            for x, y in coords:
+                board.is_valid_move(x, y)
+            total += clock() - start
+            calls += len(coords)
+        if move is None:
+            board.pass_move()
+        else:
+            board.place_stone(*move)
+    return total, calls
+
+
+def benchmark(size: int, games: List[List[Move]]) -> Dict:
+    """各引擎在同一批对局上的热点路径耗时（每秒次数），并核对各引擎终局一致"""
+    total_moves = sum(len(game) for game in games)
+    results = {}
+    finals = {}
+    for engine in ENGINES:
+        place_total = valid_total = check_total = 0.0
+        checks = 0
+        finals[engine] = []
+        for game in games:
+            place_time, valid_time, board = replay(engine, size, game)
+            place_total += place_time
+            valid_total += valid_time
+            finals[engine].append(board.get_board_state())
+            check_time, calls = time_is_valid_move(engine, size, game)
+            check_total += check_time
+            checks += calls
+        results[engine] = {
+            'place_stone_per_sec': round(total_moves / place_total),
+            'is_valid_move_per_sec': round(checks / check_total),
+            'get_valid_moves_per_sec': round(total_moves / valid_total),
+        }
+
+    # 各引擎必须得到完全相同的终局
+    reference = finals[ENGINES[0]]
+    for engine in ENGINES[1:]:
+        if finals[engine] != reference:
+            raise SystemExit(f"引擎 {engine} 的终局与 {ENGINES[0]} 不一致")
+    return {'mode': 'benchmark', 'size': size, 'games': len(games), 'moves': total_moves,
+            'engines': results}
+
+
+def perft(board: GoBoard, depth: int) -> int:
+    """从当前局面出发，depth步（只计落子，不含虚着）可到达的叶子局面数"""
+    if depth == 0:
+        return 1
+    moves = board.get_valid_moves()
+    if depth == 1:
+        return len(moves)
+    nodes = 0
+    for x, y in moves:
+        record = board.play(x, y)
+        nodes += perft(board, depth - 1)
+        board.undo(record)
+    return nodes
+
+
+def seed_positions(size: int, rng: random.Random) -> List[List[Move]]:
+    """perft的种子局面：空棋盘，以及随机对局到约1/6、1/3棋盘点数时的局面"""
+    points = size * size
+    game = random_game(size, points // 3, rng)
+    return [[], game[:points // 6], game]
+
+
+def run_perft(size: int, depth: int, rng: random.Random) -> Dict:
+    """对每个种子局面、每个引擎做perft，各引擎的结点数必须一致"""
+    positions = []
+    for sequence in seed_positions(size, rng):
+        counts = {}
+        times = {}
+        for engine in ENGINES:
+            board = replay(engine, size, sequence)[2]
+            start = time.perf_counter()
+            counts[engine] = perft(board, depth)
+            times[engine] = time.perf_counter() - start
+        reference = counts[ENGINES[0]]
+        for engine in ENGINES[1:]:
+            if counts[engine] != reference:
+                raise SystemExit(f"perft不一致：第{len(sequence)}手的局面，"
+                                 f"{ENGINES[0]} {reference}，{engine} {counts[engine]}")
+        positions.append({
+            'ply': len(sequence),
+            'nodes': reference,
+            'nodes_per_sec': {engine: round(reference / max(times[engine], 1e-9)) for engine in ENGINES},
+        })
+    return {'mode': 'perft', 'size': size, 'depth': depth, 'positions': positions}
+
+
+def run_mcts(size: int, seconds: float, rng: random.Random, workers: int = 1) -> Dict:
+    """树搜索AI在每个种子局面上搜索seconds秒，统计每秒模拟次数和树结点数（内存由结点数上限约束）"""
+    from .mcts import MCTSAI
+
+    positions = []
+    for sequence in seed_positions(size, rng):
+        board = replay(ENGINES[0], size, sequence)[2]
+        ai = MCTSAI(board, board.current_player, time_limit=seconds, playouts=1 << 30, workers=workers)
+        ai.get_move()
+        stats = ai.last_stats
+        positions.append({
+            'ply': len(sequence),
+            'playouts': stats['playouts'],
+            'playouts_per_sec': stats['playouts_per_sec'],
+            'nodes': stats['nodes'],
+            'workers': stats['workers'],
+        })
+    return {'mode': 'mcts', 'size': size, 'seconds': seconds, 'workers': workers, 'positions': positions}
+
+
+def _state(board: GoBoard) -> tuple:
+    return (bytes(board.cells), board.captured_black, board.captured_white, board.ko_point,
+            board.current_player, board.position_hash)
+
+
+def fuzz(size: int, total: int, game_length: int, seed: int, undo_rate: float = 0.1) -> Dict:
+    """
+    差分模糊测试：两个引擎走同一串随机着手（偶尔虚着、悔棋），每一手后比对
+    盘面、提子数、打劫点、行棋方和哈希，每隔若干手比对合法点。发现不一致立即报告
+    """
+    rng = random.Random(seed)
+    reference_engine, other_engine = ENGINES[0], ENGINES[1]
+    moves = games = 0
+    start = time.perf_counter()
+    while moves < total:
+        games += 1
+        reference = GoBoard(size, engine=reference_engine)
+        other = GoBoard(size, engine=other_engine)
+        for ply in range(game_length):
+            valid = reference.get_valid_moves()
+            if ply % 10 == 0 and sorted(valid) != sorted(other.get_valid_moves()):
+                return _mismatch(seed, games, ply, "合法点")
+            roll = rng.random()
+            if reference.move_history and roll < undo_rate:
+                reference.undo()
+                other.undo()
+            elif not valid or roll > 0.98:
+                reference.pass_move()
+                other.pass_move()
+            else:
+                x, y = rng.choice(valid)
+                if reference.place_stone(x, y) != other.place_stone(x, y):
+                    return _mismatch(seed, games, ply, f"落子({x},{y})的结果")
+            moves += 1
+            if _state(reference) != _state(other):
+                return _mismatch(seed, games, ply, "盘面/提子/打劫点")
+            if moves >= total:
+                break
+    elapsed = time.perf_counter() - start
+    return {'mode': 'fuzz', 'ok': True, 'size': size, 'seed': seed, 'games': games,
+            'moves': moves, 'moves_per_sec': round(moves / elapsed)}
+
+
+def _mismatch(seed: int, game: int, ply: int, what: str) -> Dict:
+    return {'mode': 'fuzz', 'ok': False, 'seed': seed, 'game': game, 'ply': ply,
+            'error': f"{ENGINES[0]} 与 {ENGINES[1]} 的{what}不一致"}
+
+
+def game_footprint(engine: str, size: int, sequence: List[Move]) -> Tuple[int, int]:
+    """
+    按着手序列重放一局，返回棋盘和AI常驻的内存（字节，tracemalloc统计）：
+    (进行中的对局, 空闲后被 GameManager 释放了可重建结构的对局)
+    """
+    # 预热：按棋盘大小共享的表不计入单局
+    replay(engine, size, sequence[:1])
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        board = replay(engine, size, sequence)[2]
+        ai = create_ai(board, 2, "medium")
+        board.get_valid_moves()  # 进行中的对局维护着合法点掩码
+        gc.collect()
+        active = tracemalloc.get_traced_memory()[0]
+        board.release()
+        gc.collect()
+        idle = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del board, ai
+    return active - before, idle - before
+
+
+# 死活判断的回归局面（9路，黑棋在左上角被白棋围住）：(名称, 黑子, 白子, 黑棋是否应判为死子)
+LIFE_CASES = [
+    ("角上板六（2x3眼位）",
+     [(x, 2) for x in range(4)] + [(3, 0), (3, 1)],
+     [(x, 3) for x in range(5)] + [(4, y) for y in range(3)], False),
+    ("12个点的大眼",
+     [(x, 3) for x in range(5)] + [(4, y) for y in range(3)],
+     [(x, 4) for x in range(6)] + [(5, y) for y in range(4)], False),
+    ("两个眼",
+     [(x, 2) for x in range(4)] + [(3, 0), (3, 1), (1, 0), (1, 1)],
+     [(x, 3) for x in range(5)] + [(4, y) for y in range(3)], False),
+    ("角上直三",
+     [(x, 1) for x in range(4)] + [(3, 0)],
+     [(x, 2) for x in range(5)] + [(4, 0), (4, 1)], True),
+    ("角上方四",
+     [(x, 2) for x in range(3)] + [(2, 0), (2, 1)],
+     [(x, 3) for x in range(4)] + [(3, y) for y in range(3)], True),
+]
+
+
+def check_life() -> bool:
+    """逐个检查 LIFE_CASES 中黑棋的死活判断"""
+    from .life import dead_stones
+
+    ok = True
+    for name, black, white, expected in LIFE_CASES:
+        board = GoBoard(9)
+        board.setup_position(black, white)
+        dead = set(dead_stones(board))
+        stones = {board.index(x, y) for x, y in black}
+        judged = stones <= dead if expected else not stones & dead
+        ok = ok and judged
+        print(f"{name:<12}{'死' if expected else '活'}  {'ok' if judged else '判断错误'}")
+    return ok
+
+
+def check_memory(size: int, moves: int, seed: int) -> bool:
+    """对每个引擎测量一局的内存占用，空闲对局与 MEMORY_BUDGET 比较（进行中的对局只报告）"""
+    sequence = random_game(size, moves, random.Random(seed))
+    ok = True
+    print(f"{size}路，{moves}手后每局常驻内存（进行中 / 空闲）")
+    for engine in ENGINES:
+        active, idle = game_footprint(engine, size, sequence)
+        budget = MEMORY_BUDGET[engine]
+        status = "ok" if idle <= budget else "超出预算"
+        ok = ok and idle <= budget
+        print(f"{engine:<10}{active / 1024:>8.1f} KB{idle / 1024:>8.1f} KB  预算 {budget / 1024:.0f} KB  {status}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="比较棋盘引擎在热点路径上的性能并校验正确性")
+    parser.add_argument("--size", type=int, default=19)
+    parser.add_argument("--games", type=int, default=5)
+    parser.add_argument("--moves", type=int, default=250)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--memory", action="store_true", help="检查每局内存占用（默认120手）")
+    parser.add_argument("--life", action="store_true", help="检查死活判断的回归局面")
+    parser.add_argument("--perft", type=int, metavar="DEPTH", help="统计种子局面DEPTH步内可到达的局面数")
+    parser.add_argument("--fuzz", type=int, metavar="MOVES", help="两个引擎差分模糊测试的总手数")
+    parser.add_argument("--mcts", type=float, metavar="SECONDS", help="树搜索AI每步搜索SECONDS秒的模拟速度")
+    parser.add_argument("--workers", type=int, default=1, help="--mcts 使用的进程数（根并行）")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args(argv)
+
+    if args.memory:
+        if not check_memory(args.size, min(args.moves, 120), args.seed):
+            sys.exit(1)
+        return
+    if args.life:
+        if not check_life():
+            sys.exit(1)
+        return
+
+    rng = random.Random(args.seed)
+    if args.perft is not None:
+        report = run_perft(args.size, args.perft, rng)
+    elif args.mcts is not None:
+        report = run_mcts(args.size, args.mcts, rng, args.workers)
+    elif args.fuzz is not None:
+        report = fuzz(args.size, args.fuzz, args.moves, args.seed)
+    else:
+        games = [random_game(args.size, args.moves, rng) for _ in range(args.games)]
+        report = benchmark(args.size, games)
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False))
+    else:
+        _print_report(report)
+    if not report.get('ok', True):
+        sys.exit(1)
+
+
+def _print_report(report: Dict):
+    """按模式打印可读的结果"""
+    size = report['size']
+    if report['mode'] == 'perft':
+        print(f"{size}路 perft({report['depth']})")
+        print(f"{'手数':<8}{'局面数':>14}" + ''.join(f"{engine + '(结点/秒)':>20}" for engine in ENGINES))
+        for position in report['positions']:
+            print(f"{position['ply']:<8}{position['nodes']:>14}"
+                  + ''.join(f"{position['nodes_per_sec'][engine]:>20}" for engine in ENGINES))
+    elif report['mode'] == 'mcts':
+        print(f"{size}路，树搜索每步{report['seconds']}秒，{report['workers']}个进程")
+        print(f"{'手数':<8}{'模拟次数':>10}{'模拟/秒':>10}{'结点数':>10}{'进程数':>8}")
+        for position in report['positions']:
+            print(f"{position['ply']:<8}{position['playouts']:>10}{position['playouts_per_sec']:>10}"
+                  f"{position['nodes']:>10}{position['workers']:>8}")
+    elif report['mode'] == 'fuzz':
+        if report['ok']:
+            print(f"{size}路，{report['games']}局共{report['moves']}手，"
+                  f"{ENGINES[0]} 与 {ENGINES[1]} 一致（{report['moves_per_sec']}手/秒）")
+        else:
+            print(f"种子{report['seed']} 第{report['game']}局第{report['ply']}手：{report['error']}")
+    else:
+        print(f"{size}路，{report['games']}局，共{report['moves']}手（每秒次数）")
+        print(f"{'引擎':<10}{'place_stone':>14}{'is_valid_move':>16}{'get_valid_moves':>18}")
+        for engine, rates in report['engines'].items():
+            print(f"{engine:<10}{rates['place_stone_per_sec']:>14}{rates['is_valid_move_per_sec']:>16}"
+                  f"{rates['get_valid_moves_per_sec']:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+位棋盘规则引擎
+用Python大整数表示黑、白棋子集合，位序号沿用GoBoard带哨兵边框的一维索引，
+边框那一圈天然充当填充列。棋串、气、提子和合法点都通过移位与掩码运算求得，
+泛洪填充的循环次数只与棋串直径有关，每一轮都在C层完成。
+
+通过 GoBoard(size, engine="bitboard") 创建。
+"""
+
+from typing import Iterator, List, Tuple
+
+from .go_board import GoBoard, EMPTY, BORDER
+
+
+class BitboardGoBoard(GoBoard):
+    """位棋盘实现的围棋棋盘，与默认引擎行为一致"""
+
+    __slots__ = ('on_board', '_stones')
+    _FIELDS = GoBoard._FIELDS + __slots__
+
+    def __init__(self, size: int = 19, superko: bool = False, engine: str = "bitboard"):
+        super().__init__(size, superko, "bitboard")
+        # 棋盘内所有交叉点的掩码，扩张运算后用它去掉越界的位
+        self.on_board = 0
+        for p in self.points:
+            self.on_board |= 1 << p
+        # 按颜色索引的棋子集合：_stones[1] 黑，_stones[2] 白
+        self._stones = [0, 0, 0]
+        # 位棋盘不使用棋串对象和增量合法点缓存，合法点由 legal_moves_mask 一次算出
+        self._chains = self._low = None
+        self._legal = self._dirty = None
+
+    def _copy_chains(self, other: GoBoard):
+        """整数不可变，只需复制按颜色索引的列表"""
+        other._stones = list(self._stones)
+
+    @staticmethod
+    def _bits(mask: int) -> Iterator[int]:
+        """按从小到大的顺序遍历掩码中的位"""
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def _empty_mask(self) -> int:
+        """空点集合"""
+        return self.on_board & ~(self._stones[1] | self._stones[2])
+
+    def _neighbors_mask(self, mask: int) -> int:
+        """与集合相邻（不含集合本身）的棋盘内交叉点"""
+        s = self.stride
+        return ((mask << 1) | (mask >> 1) | (mask << s) | (mask >> s)) & self.on_board & ~mask
+
+    def _group_mask(self, p: int) -> int:
+        """索引p所在棋串的掩码（移位扩张直到不再增长）"""
+        own = self._stones[self.cells[p]]
+        s = self.stride
+        group = 1 << p
+        while True:
+            grown = (group | (group << 1) | (group >> 1) | (group << s) | (group >> s)) & own
+            if grown == group:
+                return group
+            group = grown
+
+    def _liberties_mask(self, group: int) -> int:
+        """棋串的气"""
+        return self._neighbors_mask(group) & self._empty_mask()
+
+    def chain_stones(self, p: int) -> List[int]:
+        """获取索引p所在棋串的全部棋子（一维索引）"""
+        if self.cells[p] not in (1, 2):
+            return []
+        return list(self._bits(self._group_mask(p)))
+
+    def liberty_count(self, p: int) -> int:
+        """获取索引p所在棋串的气数"""
+        if self.cells[p] not in (1, 2):
+            return 0
+        return self._liberties_mask(self._group_mask(p)).bit_count()
+
+    def chain_liberties(self, p: int) -> List[int]:
+        """获取索引p所在棋串的气（一维索引，升序）"""
+        if self.cells[p] not in (1, 2):
+            return []
+        return list(self._bits(self._liberties_mask(self._group_mask(p))))
+
+    def low_liberty_chains(self, color: int, max_liberties: int = 2) -> List[Tuple[List[int], List[int]]]:
+        """color方气数不超过max_liberties的棋串：[(棋子, 气)]，逐块用掩码求出"""
+        found = []
+        empty = self._empty_mask()
+        rest = self._stones[color]
+        while rest:
+            group = self._group_mask((rest & -rest).bit_length() - 1)
+            rest &= ~group
+            liberties = self._neighbors_mask(group) & empty
+            if liberties.bit_count() <= max_liberties:
+                found.append((list(self._bits(group)), list(self._bits(liberties))))
+        return found
+
+    def _is_legal(self, p: int, player: int) -> bool:
+        """检查在索引p落子是否合法（不含打劫判断）"""
+        cells = self.cells
+        if cells[p] != EMPTY:
+            return False
+
+        empty = self._empty_mask()
+        if self._neighbors_mask(1 << p) & empty:
+            return True
+
+        empty &= ~(1 << p)
+        for d in self.neighbor_offsets:
+            q = p + d
+            c = cells[q]
+            if c == BORDER:
+                continue
+            liberties = self._neighbors_mask(self._group_mask(q)) & empty
+            if c == player:
+                # 除p之外还有气，落子后仍然有气
+                if liberties:
+                    return True
+            elif not liberties:
+                # 对方棋串只剩p这一口气，落子即可提吃
+                return True
+
+        return False
+
+    def _add_stone(self, p: int, player: int):
+        """在索引p放置棋子"""
+        self.cells[p] = player
+        self._stones[player] |= 1 << p
+        self._hash ^= self._zobrist[player][p]
+        self._sym_hash ^= self._sym_zobrist[player][p]
+
+    def _find_and_capture_stones(self, p: int, opponent: int) -> List[int]:
+        """查找并移除所有被提吃的对方棋子，返回被提吃的棋子（一维索引）"""
+        captured = 0
+        empty = self._empty_mask()
+        for d in self.neighbor_offsets:
+            q = p + d
+            if self.cells[q] != opponent or captured >> q & 1:
+                continue
+            group = self._group_mask(q)
+            if not self._neighbors_mask(group) & empty:
+                captured |= group
+
+        if not captured:
+            return []
+
+        self._stones[opponent] &= ~captured
+        keys = self._zobrist[opponent]
+        sym_keys = self._sym_zobrist[opponent]
+        stones = list(self._bits(captured))
+        for s in stones:
+            self.cells[s] = EMPTY
+            self._hash ^= keys[s]
+            self._sym_hash ^= sym_keys[s]
+        return stones
+
+    def _take_back(self, p: int, player: int, captured: Tuple[int, ...]):
+        """移除索引p的棋子并放回被提吃的对方棋子"""
+        opponent = 3 - player
+        self.cells[p] = EMPTY
+        self._stones[player] &= ~(1 << p)
+        self._hash ^= self._zobrist[player][p]
+        self._sym_hash ^= self._sym_zobrist[player][p]
+
+        keys = self._zobrist[opponent]
+        sym_keys = self._sym_zobrist[opponent]
+        for s in captured:
+            self.cells[s] = opponent
+            self._stones[opponent] |= 1 << s
+            self._hash ^= keys[s]
+            self._sym_hash ^= sym_keys[s]
+
+    def legal_moves_mask(self, player: int) -> int:
+        """
+        一次性求出player的全部合法点（不含打劫和超级劫判断）
+
+        空点合法，当且仅当：有相邻空点；或是某个气数≥2的己方棋串的气；
+        或是某个只剩一口气的对方棋串的最后一口气
+        """
+        empty = self._empty_mask()
+        s = self.stride
+        # 至少有一个相邻空点的空点
+        legal = ((empty << 1) | (empty >> 1) | (empty << s) | (empty >> s)) & empty
+        opponent = 3 - player
+
+        for color in (player, opponent):
+            remaining = self._stones[color]
+            while remaining:
+                low = remaining & -remaining
+                group = self._group_mask(low.bit_length() - 1)
+                remaining &= ~group
+                liberties = self._neighbors_mask(group) & empty
+                if color == player:
+                    if liberties & (liberties - 1):  # 至少两口气
+                        legal |= liberties
+                elif not liberties & (liberties - 1):  # 恰好一口气
+                    legal |= liberties
+
+        return legal
+
+    def _legal_points(self, player: int) -> Iterator[int]:
+        """不考虑打劫的合法点"""
+        return self._bits(self.legal_moves_mask(player))
@@ -0,0 +1,128 @@
+"""
+按棋盘大小预计算的几何表
+每种大小只构建一次，所有对局和AI共享（只读）。索引与GoBoard一致：
+带一圈哨兵边框的一维索引 p = (y + 1) * (size + 2) + x + 1
+"""
+
+from typing import Dict, FrozenSet, List, Tuple
+
+# 切比雪夫窗口的最大半径（厚势、效率、影响力都只看3路以内）
+MAX_RADIUS = 3
+
+# 棋盘的8种对称变换（旋转、翻转），编号的三个位：1 左右翻转，2 上下翻转，4 先沿对角线交换x、y
+SYMMETRIES = 8
+
+
+def transform_point(x: int, y: int, size: int, symmetry: int) -> Tuple[int, int]:
+    """对坐标做第symmetry种对称变换"""
+    if symmetry & 4:
+        x, y = y, x
+    if symmetry & 1:
+        x = size - 1 - x
+    if symmetry & 2:
+        y = size - 1 - y
+    return x, y
+
+
+def inverse_symmetry(symmetry: int) -> int:
+    """逆变换的编号（含对角线交换时，先翻转再交换等于先交换再翻转另一条轴）"""
+    if symmetry & 4:
+        return 4 | (symmetry & 1) << 1 | (symmetry & 2) >> 1
+    return symmetry
+
+
+class BoardTables:
+    """某个棋盘大小的预计算表"""
+
+    __slots__ = ('size', 'stride', 'points', 'coords', 'ordinals', 'neighbors', 'diagonals',
+                 'rings', 'line', 'corner_stars', 'side_stars', 'star_points',
+                 'opening_points', 'symmetries')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.stride = stride = size + 2
+        cell_count = stride * stride
+
+        # 棋盘内交叉点（行优先）及一维索引到坐标的映射
+        self.points = tuple((y + 1) * stride + x + 1 for y in range(size) for x in range(size))
+        self.coords: List[Tuple[int, int]] = [None] * cell_count
+        # 一维索引 -> 行优先序号 y * size + x（用于紧凑掩码），边框为-1
+        self.ordinals: List[int] = [-1] * cell_count
+        for i, p in enumerate(self.points):
+            row, col = divmod(p, stride)
+            self.coords[p] = (col - 1, row - 1)
+            self.ordinals[p] = i
+
+        # 棋盘内的相邻点、对角点
+        self.neighbors: List[Tuple[int, ...]] = [()] * cell_count
+        self.diagonals: List[Tuple[int, ...]] = [()] * cell_count
+        # rings[p][d]：与p的切比雪夫距离恰好为d的棋盘内交叉点（d = 1..MAX_RADIUS，rings[p][0]为空）
+        self.rings: List[Tuple[Tuple[int, ...], ...]] = [()] * cell_count
+        # 到最近边线的距离（一线为0）
+        self.line: List[int] = [0] * cell_count
+
+        for p in self.points:
+            x, y = self.coords[p]
+            self.neighbors[p] = self._offsets_on_board(x, y, ((1, 0), (-1, 0), (0, 1), (0, -1)))
+            self.diagonals[p] = self._offsets_on_board(x, y, ((1, 1), (1, -1), (-1, 1), (-1, -1)))
+            rings = [[] for _ in range(MAX_RADIUS + 1)]
+            for ny in range(max(0, y - MAX_RADIUS), min(size, y + MAX_RADIUS + 1)):
+                for nx in range(max(0, x - MAX_RADIUS), min(size, x + MAX_RADIUS + 1)):
+                    dist = max(abs(nx - x), abs(ny - y))
+                    if dist > 0:
+                        rings[dist].append((ny + 1) * stride + nx + 1)
+            self.rings[p] = tuple(tuple(ring) for ring in rings)
+            self.line[p] = min(x, y, size - 1 - x, size - 1 - y)
+
+        # 星位：13路及以上在四线，9路在三线；边星只在13路及以上的奇数棋盘
+        self.corner_stars: FrozenSet[int] = frozenset()
+        self.side_stars: FrozenSet[int] = frozenset()
+        self.opening_points: FrozenSet[int] = frozenset()
+        if size >= 9:
+            near = 3 if size >= 13 else 2
+            far = size - 1 - near
+            self.corner_stars = self._points_at([(near, near), (near, far), (far, near), (far, far)])
+            if size >= 13 and size % 2 == 1:
+                mid = size // 2
+                self.side_stars = self._points_at([(mid, near), (mid, far), (near, mid), (far, mid)])
+        if size >= 13:
+            # 小目
+            a, b = 2, 3
+            self.opening_points = self._points_at([
+                (a, b), (b, a), (a, size - 1 - b), (b, size - 1 - a),
+                (size - 1 - a, b), (size - 1 - b, a),
+                (size - 1 - a, size - 1 - b), (size - 1 - b, size - 1 - a),
+            ])
+        self.star_points = self.corner_stars | self.side_stars
+
+        # symmetries[t][p]：第t种对称变换把p映射到的一维索引（边框映射为自身）
+        self.symmetries: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(self._transformed(p, t) for p in range(cell_count)) for t in range(SYMMETRIES))
+
+    def _transformed(self, p: int, symmetry: int) -> int:
+        coords = self.coords[p]
+        if coords is None:
+            return p
+        x, y = transform_point(*coords, self.size, symmetry)
+        return (y + 1) * self.stride + x + 1
+
+    def _offsets_on_board(self, x: int, y: int, offsets) -> Tuple[int, ...]:
+        """按坐标偏移取棋盘内的点"""
+        size = self.size
+        return tuple((y + dy + 1) * self.stride + x + dx + 1 for dx, dy in offsets
+                     if 0 <= x + dx < size and 0 <= y + dy < size)
+
+    def _points_at(self, coords) -> FrozenSet[int]:
+        """坐标列表转换为一维索引集合"""
+        return frozenset((y + 1) * self.stride + x + 1 for x, y in coords)
+
+
+_tables: Dict[int, BoardTables] = {}
+
+
+def get_tables(size: int) -> BoardTables:
+    """获取某个棋盘大小的预计算表（首次使用时构建）"""
+    tables = _tables.get(size)
+    if tables is None:
+        tables = _tables[size] = BoardTables(size)
+    return tables
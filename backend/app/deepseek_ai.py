@@ -6,9 +6,13 @@ DeepSeek AI引擎
 import os
 import re
 import json
-from typing import Tuple, List, Set
+from typing import Tuple, List, Optional
 from openai import OpenAI
 from .go_board import GoBoard
+from .symmetry import SymmetricCache, SymmetricView
+
+# DeepSeek的回答按对称规范化的局面缓存：旋转/翻转后相同的局面不再重复调用API
+explanation_cache = SymmetricCache()
 
 
 class DeepSeekAI:
@@ -47,6 +51,15 @@ class DeepSeekAI:
 
     def _get_deepseek_move(self, valid_moves: List[Tuple[int, int]]) -> Tuple[int, int, str]:
         """调用DeepSeek API获取落子建议"""
+        view = explanation_cache.view(self.board, self.player, self.difficulty)
+        cached = view.get_choice()
+        if cached is not None and cached[:2] in valid_moves:
+            x, y, explanation = cached
+            if explanation is None:
+                # 缓存来自旋转/翻转后的局面：落点可以换算，解释里的方位描述不能，重新请求解释
+                explanation = self._explain_move(x, y)
+                view.put_choice(x, y, explanation)
+            return x, y, explanation
 
         # 构造棋盘状态描述
         board_description = self._describe_board()
@@ -85,15 +98,40 @@ class DeepSeekAI:
 
         # 解析响应
         content = response.choices[0].message.content
-        return self._parse_response(content, valid_moves)
+        return self._parse_response(content, valid_moves, view)
+
+    def _explain_move(self, x: int, y: int) -> str:
+        """请DeepSeek解释已经选定的落子"""
+        prompt = f"""你是一个围棋AI助手。请解释在当前棋局中为什么选择这个落子。
+
+当前信息：
+- 棋盘大小：{self.board.size}x{self.board.size}
+- 你执：{'黑棋' if self.player == 1 else '白棋'}
+- 当前手数：{len(self.board.move_history)}
+- 选择的落子：({x+1},{y+1})
+
+{self._describe_board()}
+
+请详细说明这步棋的战术和战略考虑："""
+
+        response = self.client.chat.completions.create(
+            model="deepseek-chat",
+            messages=[
+                {"role": "system", "content": "你是一个专业的围棋AI助手，精通围棋理论和战术。"},
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.7,
+            max_tokens=1000
+        )
+        return self._extract_explanation(response.choices[0].message.content)
 
     def _describe_board(self) -> str:
         """描述棋盘状态"""
         desc = []
 
         # 基本信息
-        black_count = sum(row.count(1) for row in self.board.board)
-        white_count = sum(row.count(2) for row in self.board.board)
+        black_count = self.board.cells.count(1)
+        white_count = self.board.cells.count(2)
 
         desc.append(f"盘面情况：")
         desc.append(f"- 黑子数量：{black_count}")
@@ -145,76 +183,36 @@ class DeepSeekAI:
     def _find_fight_areas(self) -> List[Tuple[int, int]]:
         """寻找战斗激烈的区域"""
         fight_areas = []
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        board = self.board
+        cells = board.cells
 
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.board[y][x] != 0:
-                    # 检查周围是否有对方棋子
-                    for dx, dy in directions:
-                        nx, ny = x + dx, y + dy
-                        if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                            if self.board.board[ny][nx] != 0 and self.board.board[ny][nx] != self.board.board[y][x]:
-                                fight_areas.append((x, y))
-                                break
+        for p in board.points:
+            color = cells[p]
+            if color == 1 or color == 2:
+                # 检查周围是否有对方棋子
+                if any(cells[p + d] == 3 - color for d in board.neighbor_offsets):
+                    fight_areas.append(board.coords(p))
+                    if len(fight_areas) == 10:
+                        break
 
-        return fight_areas[:10]  # 返回最多10个战斗点
+        return fight_areas  # 返回最多10个战斗点
 
     def _find_endangered_groups(self) -> str:
         """寻找处于危险中的棋组"""
         endangered_info = []
+        board = self.board
 
-        # 检查己方棋组
-        visited = set()
-        for y in range(self.board.size):
-            for x in range(self.board.size):
-                if self.board.board[y][x] == self.player and (x, y) not in visited:
-                    group = self._get_group(x, y, self.player)
-                    visited.update(group)
-                    liberties = self._count_group_liberties(group)
-
-                    if liberties <= 2:
-                        group_pos = f"({x+1},{y+1})附近的{len(group)}颗子"
-                        endangered_info.append(f"{group_pos}仅有{liberties}气")
+        # 检查己方棋组（气数不超过2的棋串由棋盘增量维护）
+        for group, liberties in board.low_liberty_chains(self.player):
+            x, y = board.coords(group[0])
+            group_pos = f"({x+1},{y+1})附近的{len(group)}颗子"
+            endangered_info.append(f"{group_pos}仅有{len(liberties)}气")
 
         return "; ".join(endangered_info) if endangered_info else "无"
 
-    def _get_group(self, x: int, y: int, player: int) -> Set[Tuple[int, int]]:
-        """获取相连的棋子组"""
-        group = set()
-        stack = [(x, y)]
-        visited = set()
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        while stack:
-            cx, cy = stack.pop()
-            if (cx, cy) in visited:
-                continue
-            visited.add((cx, cy))
-
-            if 0 <= cx < self.board.size and 0 <= cy < self.board.size and self.board.board[cy][cx] == player:
-                group.add((cx, cy))
-                for dx, dy in directions:
-                    stack.append((cx + dx, cy + dy))
-
-        return group
-
-    def _count_group_liberties(self, group: Set[Tuple[int, int]]) -> int:
-        """计算棋子组的气数"""
-        liberties = set()
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for gx, gy in group:
-            for dx, dy in directions:
-                nx, ny = gx + dx, gy + dy
-                if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                    if self.board.board[ny][nx] == 0:
-                        liberties.add((nx, ny))
-
-        return len(liberties)
-
-    def _parse_response(self, content: str, valid_moves: List[Tuple[int, int]]) -> Tuple[int, int, str]:
-        """解析DeepSeek的响应"""
+    def _parse_response(self, content: str, valid_moves: List[Tuple[int, int]],
+                        view: Optional[SymmetricView] = None) -> Tuple[int, int, str]:
+        """解析DeepSeek的响应（解析成功时写入view对应的缓存条目）"""
 
         # 尝试提取坐标
         # 支持多种格式：(10,10), (10, 10), 10,10等
@@ -240,6 +238,8 @@ class DeepSeekAI:
                 if (x, y) in valid_moves:
                     # 提取解释
                     explanation = self._extract_explanation(content)
+                    if view is not None:
+                        view.put_choice(x, y, explanation)
                     return x, y, explanation
 
         # 如果无法解析或坐标不合法，使用合法的随机位置
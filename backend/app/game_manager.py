@@ -1,20 +1,73 @@
 """游戏状态管理"""
 
-from .go_board import GoBoard
+import base64
+import functools
+import io
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from .go_board import GoBoard, print_capture_trace
 from .go_ai import create_ai
 from .deepseek_ai import create_deepseek_ai
+from . import sgf
+
+# 超过这么多秒没有请求的对局释放棋盘中可重建的结构（见 GoBoard.release），进行中的对局保持增量结构
+IDLE_RELEASE_SECONDS = 300
+
+
+def _tracked(method):
+    """对局请求的前后各记录一次访问时间，并释放已经空闲的其他对局"""
+    @functools.wraps(method)
+    def wrapper(self, game_id: str, *args, **kwargs):
+        self._touch(game_id)
+        try:
+            return method(self, game_id, *args, **kwargs)
+        finally:
+            self._touch(game_id)
+    return wrapper
 
 
 class GameManager:
     """游戏管理器"""
 
-    def __init__(self):
+    def __init__(self, idle_seconds: float = IDLE_RELEASE_SECONDS):
         self.games = {}
-
+        self.idle_seconds = idle_seconds
+        # 尚未释放的对局，按最近访问时间从旧到新排列
+        self._recent = OrderedDict()
+        self._recent_lock = threading.Lock()
+
+    def _touch(self, game_id: str):
+        """记录game_id的访问，并释放空闲超过 idle_seconds 的对局"""
+        now = time.monotonic()
+        with self._recent_lock:
+            if game_id in self.games:
+                self._recent[game_id] = now
+                self._recent.move_to_end(game_id)
+            recent = self._recent
+            while recent:
+                oldest, last = next(iter(recent.items()))
+                if now - last < self.idle_seconds:
+                    break
+                del recent[oldest]
+                game = self.games.get(oldest)
+                if game is not None:
+                    game['board'].release()
+
+    @_tracked
     def create_game(self, game_id: str, difficulty: str = "medium",
-                    size: int = 19, ai_color: int = 2) -> dict:
-        """创建新游戏"""
-        board = GoBoard(size)
+                    size: int = 19, ai_color: int = 2, superko: bool = False,
+                    engine: str = "list") -> dict:
+        """
+        创建新游戏
+
+        engine 选择规则引擎：默认 "list" 查询最快；"bitboard" 不维护棋串结构。
+        空闲超过 IDLE_RELEASE_SECONDS 的对局释放可重建的结构，每局只占几KB（见 python -m app.bench --memory）
+        """
+        board = GoBoard(size, superko=superko, engine=engine)
+        self._watch(board)
         # 使用本地AI快速决策，DeepSeek用于解释
         ai = create_ai(board, ai_color, difficulty)
         self.games[game_id] = {
@@ -29,13 +82,23 @@ class GameManager:
             'game_id': game_id,
             'board_size': size,
             'current_player': board.current_player,
-            'ai_color': ai_color
+            'ai_color': ai_color,
+            'superko': superko,
+            'engine': engine
         }
 
+    @staticmethod
+    def _watch(board: GoBoard):
+        """设置 GO_CAPTURE_DEBUG=1 时打印提子诊断信息"""
+        if os.environ.get('GO_CAPTURE_DEBUG'):
+            board.subscribe('capture', print_capture_trace)
+
     def get_game(self, game_id: str):
-        """获取游戏"""
+        """获取游戏（算作一次访问，直接使用棋盘的接口也不会被当作空闲对局释放）"""
+        self._touch(game_id)
         return self.games.get(game_id)
 
+    @_tracked
     def make_move(self, game_id: str, x: int, y: int) -> dict:
         """玩家落子（立即返回，不等待AI）"""
         game = self.get_game(game_id)
@@ -73,6 +136,7 @@ class GameManager:
                 board.pass_move()
                 result['ai_move'] = None
                 result['ai_explanation'] = "我选择虚着"
+            result['ai_stats'] = game['ai'].last_stats
 
             result['board'] = board.get_board_state()
             result['current_player'] = board.current_player
@@ -81,11 +145,7 @@ class GameManager:
             result['last_move'] = board.last_move
 
             if board.is_game_over():
-                game['game_over'] = True
-                black_score, white_score = board.get_score()
-                result['game_over'] = True
-                result['score'] = {'black': black_score, 'white': white_score}
-                result['winner'] = 'black' if black_score > white_score else 'white'
+                self._finish_game(game, result)
 
             return result
 
@@ -109,14 +169,12 @@ class GameManager:
 
         # 检查游戏是否结束
         if board.is_game_over():
-            game['game_over'] = True
-            black_score, white_score = board.get_score()
-            result['score'] = {'black': black_score, 'white': white_score}
-            result['winner'] = 'black' if black_score > white_score else 'white'
+            self._finish_game(game, result)
             result['is_ai_turn'] = False
 
         return result
 
+    @_tracked
     def make_ai_move(self, game_id: str) -> dict:
         """AI落子（单独的接口）"""
         game = self.get_game(game_id)
@@ -157,6 +215,7 @@ class GameManager:
             result['ai_move'] = None
             result['ai_explanation'] = "我选择虚着"
             result['message'] = "AI虚着"
+        result['ai_stats'] = game['ai'].last_stats
 
         result['board'] = board.get_board_state()
         result['current_player'] = board.current_player
@@ -165,14 +224,11 @@ class GameManager:
         result['last_move'] = board.last_move
 
         if board.is_game_over():
-            game['game_over'] = True
-            black_score, white_score = board.get_score()
-            result['game_over'] = True
-            result['score'] = {'black': black_score, 'white': white_score}
-            result['winner'] = 'black' if black_score > white_score else 'white'
+            self._finish_game(game, result)
 
         return result
 
+    @_tracked
     def pass_turn(self, game_id: str) -> dict:
         """玩家虚着"""
         game = self.get_game(game_id)
@@ -204,6 +260,7 @@ class GameManager:
                 board.pass_move()
                 result['ai_move'] = None
                 result['ai_explanation'] = "我选择虚着"
+            result['ai_stats'] = game['ai'].last_stats
 
             result['board'] = board.get_board_state()
             result['current_player'] = board.current_player
@@ -211,45 +268,147 @@ class GameManager:
             result['captured_white'] = board.captured_white
 
             if board.is_game_over():
-                game['game_over'] = True
-                black_score, white_score = board.get_score()
-                result['game_over'] = True
-                result['score'] = {'black': black_score, 'white': white_score}
-                result['winner'] = 'black' if black_score > white_score else 'white'
+                self._finish_game(game, result)
 
         return result
 
-    def get_valid_moves(self, game_id: str) -> dict:
-        """获取合法落子位置"""
+    def _finish_game(self, game: dict, result: dict):
+        """终局：一次区域分析（含死子判断）得出双方分数和领地，写入返回结果"""
+        regions = game['board'].analyze_regions()
+        black_score, white_score = regions['black_score'], regions['white_score']
+        game['game_over'] = True
+        result['game_over'] = True
+        result['score'] = {'black': black_score, 'white': white_score}
+        result['territory'] = {
+            'black': regions['black_territory'],
+            'white': regions['white_territory'],
+            'neutral': regions['neutral']
+        }
+        # 数子前判为死子的棋子（按空点计入对方区域）
+        result['dead_stones'] = regions['dead']
+        result['winner'] = 'black' if black_score > white_score else 'white'
+
+    @_tracked
+    def get_valid_moves(self, game_id: str, bitmask: bool = False) -> dict:
+        """
+        获取合法落子位置
+
+        bitmask为True时返回按位打包的整盘掩码（base64，行优先，高位在前），
+        代替坐标列表，体积固定为 size*size/8 字节
+        """
         game = self.get_game(game_id)
         if not game:
             return {'error': '游戏不存在'}
 
+        board = game['board']
+        if bitmask:
+            return {
+                'size': board.size,
+                'valid_moves_bitmask': base64.b64encode(board.legal_bitmask()).decode('ascii')
+            }
+
         return {
-            'valid_moves': game['board'].get_valid_moves()
+            'valid_moves': board.get_valid_moves()
         }
 
+    @_tracked
     def undo_move(self, game_id: str) -> dict:
-        """悔棋（回退两步：玩家和AI各一步）"""
+        """
+        悔棋：回退到玩家上一手之前，重新轮到玩家
+
+        通常是AI和玩家各退一步；AI还没应对（或终局时最后一手是玩家）时只退玩家这一步
+        """
         game = self.get_game(game_id)
         if not game:
             return {'error': '游戏不存在'}
 
         board = game['board']
+        ai_color = game['ai_color']
 
-        if len(board.move_history) < 2:
+        if all(player == ai_color for player in board.move_history.players):
             return {'error': '没有可以悔棋的步骤'}
 
-        # 回退AI的落子
-        board.move_history.pop()
-        # 回退玩家的落子
-        last_player_move = board.move_history.pop()
+        # 先退最后一手，再一直退到轮到玩家（玩家的一手退掉时停下）
+        board.undo()
+        undone = 1
+        while board.current_player == ai_color:
+            board.undo()
+            undone += 1
+        game['game_over'] = False
 
-        # 重建棋盘状态
-        # 注意：完整的悔棋实现需要重新执行所有历史步骤
-        # 这里简化处理，只提示功能
-        return {'error': '悔棋功能需要重新实现'}
+        return {
+            'success': True,
+            'message': '悔棋成功',
+            'board': board.get_board_state(),
+            'current_player': board.current_player,
+            'captured_black': board.captured_black,
+            'captured_white': board.captured_white,
+            'last_move': board.last_move,
+            'game_over': False,
+            'undone': undone,
+            'is_ai_turn': board.current_player == ai_color
+        }
+
+    @_tracked
+    def review_position(self, game_id: str, ply: int) -> dict:
+        """复盘：第ply手之后的局面（不影响当前对局）"""
+        game = self.get_game(game_id)
+        if not game:
+            return {'error': '游戏不存在'}
+
+        board = game['board']
+        if not 0 <= ply <= len(board.move_history):
+            return {'error': '手数超出范围'}
+
+        position = board.board_at(ply)
+        return {
+            'ply': ply,
+            'total_moves': len(board.move_history),
+            'board': position.get_board_state(),
+            'current_player': position.current_player,
+            'captured_black': position.captured_black,
+            'captured_white': position.captured_white,
+            'last_move': position.last_move
+        }
+
+    @_tracked
+    def export_sgf(self, game_id: str) -> dict:
+        """导出SGF棋谱（已结束的对局带上结果）"""
+        game = self.get_game(game_id)
+        if not game:
+            return {'error': '游戏不存在'}
+
+        board = game['board']
+        result = sgf.format_result(*board.get_score()) if game['game_over'] else None
+        return {'sgf': sgf.dump_sgf(board, result)}
+
+    @_tracked
+    def import_sgf(self, game_id: str, text: str, difficulty: str = "medium",
+                   ai_color: int = 2, superko: bool = False, engine: str = "list") -> dict:
+        """从SGF棋谱（合集中的第一盘）创建对局，从棋谱最后的局面继续"""
+        try:
+            game = next(sgf.iter_games(io.StringIO(text)), None)
+            if game is None:
+                return {'error': 'SGF中没有棋局'}
+            board = sgf.replay(game, engine=engine, superko=superko)
+        except ValueError as e:
+            return {'error': f'SGF解析失败: {e}'}
+
+        info = self.create_game(game_id, difficulty, board.size, ai_color, superko, engine)
+        self._watch(board)
+        game = self.games[game_id]
+        game['board'] = board
+        game['ai'] = create_ai(board, ai_color, difficulty)
+        game['game_over'] = board.is_game_over()
+        info.update({
+            'board': board.get_board_state(),
+            'current_player': board.current_player,
+            'move_count': len(board.move_history),
+            'game_over': game['game_over']
+        })
+        return info
 
+    @_tracked
     def get_score(self, game_id: str) -> dict:
         """获取当前分数"""
         game = self.get_game(game_id)
@@ -6,16 +6,39 @@
 import random
 from typing import Tuple, List, Dict, Set
 from .go_board import GoBoard
+from .board_tables import MAX_RADIUS
+from .life import MAX_DEAD_AREA_RATIO
+from .ladder import default_reader as ladder_reader
+from .symmetry import SymmetricCache
+from .influence import influence_maps
+
+# 候选点评估结果，按对称规范化的局面缓存，所有对局共用（开局局面在不同对局中反复出现）。
+# 中盘以后几乎不会重复遇到同一局面，只缓存前 EVALUATION_CACHE_MOVES 手的局面
+evaluation_cache = SymmetricCache()
+EVALUATION_CACHE_MOVES = 20
+
+# 各难度的候选点剪枝策略（None 表示评估全部合法点），见 AdvancedAI._generate_candidates
+#   radius：离已有棋子不超过几路（切比雪夫距离，最多 MAX_RADIUS）的点进入候选
+#   stage_cap：每个阶段最多取多少个点
+#   dominant：能提吃或救回这么多子时，只评估战术点
+CANDIDATE_POLICY = {
+    "easy": {"radius": 2, "stage_cap": 30, "dominant": 2},
+    "medium": {"radius": 3, "stage_cap": 50, "dominant": 3},
+    "hard": {"radius": 3, "stage_cap": 80, "dominant": 4},
+}
 
 
 class GoAI:
     """围棋AI基类"""
 
+    __slots__ = ('board', 'player', 'difficulty', 'opponent', 'last_stats')
+
     def __init__(self, board: GoBoard, player: int, difficulty: str = "medium"):
         self.board = board
         self.player = player  # AI执黑或执白
         self.difficulty = difficulty
         self.opponent = 3 - player
+        self.last_stats = None  # 最近一次 get_move 的搜索统计（评估了多少候选点等）
 
     def get_move(self) -> Tuple[int, int, str]:
         """
@@ -25,13 +48,83 @@ class GoAI:
         raise NotImplementedError
 
 
+class _TurnFeatures:
+    """
+    一个局面下所有候选点共用的盘面特征，每回合只计算一次
+
+    chain_id / liberties：每个点所属棋串的编号和气数（空点为-1和0）
+    capture_points / save_points：在该点落子能提吃的对方棋子数 / 能救回的己方被叫吃棋子数
+    adjacent / diagonal：按颜色索引，每个点相邻 / 对角的该色棋子数
+    density：按颜色索引，density[color][d][p] 为与p切比雪夫距离恰好为d的该色棋子数（整盘影响力图）
+    """
+
+    __slots__ = ('chain_id', 'liberties', 'capture_points', 'save_points',
+                 'adjacent', 'diagonal', 'density', '_board', '_probe')
+
+    def __init__(self, board: GoBoard, player: int):
+        self._board = board
+        self._probe = None
+        cells = board.cells
+        tables = board.tables
+        cell_count = len(cells)
+
+        self.chain_id = [-1] * cell_count
+        self.liberties = bytearray(cell_count)
+        for p in board.points:
+            if cells[p] in (1, 2) and self.chain_id[p] < 0:
+                count = board.liberty_count(p)
+                for s in board.chain_stones(p):
+                    self.chain_id[s] = p
+                    self.liberties[s] = count
+
+        self.save_points = board.atari_points(player)
+        self.capture_points = board.atari_points(3 - player)
+
+        # 从每个棋子向外散布：q与p相邻当且仅当p与q相邻
+        self.adjacent = [None, bytearray(cell_count), bytearray(cell_count)]
+        self.diagonal = [None, bytearray(cell_count), bytearray(cell_count)]
+        for p in board.points:
+            color = cells[p]
+            if color != 1 and color != 2:
+                continue
+            adjacent = self.adjacent[color]
+            for q in tables.neighbors[p]:
+                adjacent[q] += 1
+            diagonal = self.diagonal[color]
+            for q in tables.diagonals[p]:
+                diagonal[q] += 1
+        self.density = influence_maps(board)
+
+    @property
+    def probe(self) -> GoBoard:
+        """征子计算用的私有副本（首次使用时复制），每次计算后恢复原状"""
+        if self._probe is None:
+            self._probe = self._board.copy()
+        return self._probe
+
+
 class AdvancedAI(GoAI):
     """高级AI - 使用深度评估和战术分析"""
 
+    __slots__ = ('move_count', 'game_phase', '_features')
+
     def __init__(self, board: GoBoard, player: int, difficulty: str = "medium"):
         super().__init__(board, player, difficulty)
-        self.move_count = len(board.move_history)
+        self._update_phase()
+
+    def _update_phase(self):
+        """按当前手数更新对局阶段并丢弃上一回合的盘面特征（AI在整局中复用，每回合都要刷新）"""
+        self.move_count = len(self.board.move_history)
         self.game_phase = self._determine_game_phase()
+        self._features = None
+
+    @property
+    def features(self) -> _TurnFeatures:
+        """当前局面的特征，由 get_move 每回合刷新一次；单独调用评估函数时按需建立"""
+        features = self._features
+        if features is None:
+            features = self._features = _TurnFeatures(self.board, self.player)
+        return features
 
     def _determine_game_phase(self) -> str:
         """判断游戏阶段"""
@@ -44,18 +137,113 @@ class AdvancedAI(GoAI):
 
     def get_move(self) -> Tuple[int, int, str]:
         """获取最佳落子"""
-        valid_moves = self.board.get_valid_moves()
+        self._update_phase()
+        valid_moves = self._candidate_moves()
 
         if not valid_moves:
             return -1, -1, "没有合法的落子位置，选择虚着"
 
+        if self._position_settled():
+            return -1, -1, "双方地域已经确定，继续落子不会改变结果，选择虚着"
+
         # 根据难度调整搜索深度
-        if self.difficulty == "easy":
-            return self._get_move_simple(valid_moves)
-        elif self.difficulty == "hard":
-            return self._get_move_advanced(valid_moves)
+        try:
+            valid_moves = self._generate_candidates(valid_moves)
+            if self.difficulty == "easy":
+                return self._get_move_simple(valid_moves)
+            elif self.difficulty == "hard":
+                return self._get_move_advanced(valid_moves)
+            else:
+                return self._get_move_medium(valid_moves)
+        finally:
+            # AI随对局常驻，特征（含征子用的棋盘副本）只在本回合内使用
+            self._features = None
+
+    def _position_settled(self) -> bool:
+        """局面已定：去掉死子后没有中立空点、没有还能打入的大块空地，也没有被打吃的棋串"""
+        board = self.board
+        max_area = len(board.points) // MAX_DEAD_AREA_RATIO
+        # 先用不判死活的快速区域分析排除明显未定的局面
+        if board.analyze_regions(remove_dead=False)['neutral'] > max_area:
+            return False
+        regions = board.analyze_regions()
+        if regions['neutral'] or any(size > max_area for size, _ in regions['regions']):
+            return False
+        return not any(board.low_liberty_chains(color, 1) for color in (1, 2))
+
+    def _candidate_moves(self) -> List[Tuple[int, int]]:
+        """由整盘合法点掩码生成候选点（行优先）"""
+        size = self.board.size
+        mask = self.board.legal_mask(self.player)
+        return [(i % size, i // size) for i, legal in enumerate(mask) if legal]
+
+    def _generate_candidates(self, valid_moves: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        分阶段生成要评估的候选点（行优先）：
+        1. 战术点：提子、救子、叫吃对方两口气的棋串，按紧急程度排序；
+           有决定性的战术点（提吃或救回 dominant 个子以上）时到此为止
+        2. 离已有棋子 radius 路以内的点，近的优先
+        3. 星位、小目等开局点
+        每个阶段最多取 stage_cap 个点；都没有时评估全部合法点。统计写入 last_stats
+        """
+        policy = CANDIDATE_POLICY.get(self.difficulty)
+        stats = {'legal': len(valid_moves), 'tactical': 0, 'near': 0, 'book': 0,
+                 'evaluated': len(valid_moves), 'early_stop': False}
+        self.last_stats = stats
+        if policy is None:
+            return valid_moves
+
+        board = self.board
+        features = self.features
+        cap = policy['stage_cap']
+        legal = {board.index(x, y): (x, y) for x, y in valid_moves}
+        chosen = set()
+
+        # 1. 战术点：提子、救子按棋子数计，叫吃按对方棋子数的一半计
+        urgency: Dict[int, float] = {}
+        for points in (features.capture_points, features.save_points):
+            for p, count in points.items():
+                urgency[p] = urgency.get(p, 0) + count
+        for stones, liberties in board.low_liberty_chains(self.opponent, 2):
+            if len(liberties) == 2:
+                for p in liberties:
+                    urgency[p] = urgency.get(p, 0) + len(stones) / 2
+        tactical = sorted((p for p in urgency if p in legal), key=lambda p: (-urgency[p], p))[:cap]
+        chosen.update(tactical)
+        stats['tactical'] = len(tactical)
+
+        decisive = max([features.capture_points.get(p, 0) for p in tactical]
+                       + [features.save_points.get(p, 0) for p in tactical], default=0)
+        if decisive >= policy['dominant']:
+            stats['early_stop'] = True
         else:
-            return self._get_move_medium(valid_moves)
+            # 2. 已有棋子附近的点：按到最近棋子的距离排序
+            radius = min(policy['radius'], MAX_RADIUS)
+            black, white = features.density[1], features.density[2]
+            near = []
+            for p in legal:
+                if p in chosen:
+                    continue
+                for d in range(1, radius + 1):
+                    if black[d][p] or white[d][p]:
+                        near.append((d, p))
+                        break
+            near.sort()
+            near = [p for _, p in near[:cap]]
+            chosen.update(near)
+            stats['near'] = len(near)
+
+            # 3. 开局点
+            tables = board.tables
+            book = sorted(p for p in tables.star_points | tables.opening_points
+                          if p in legal and p not in chosen)[:cap]
+            chosen.update(book)
+            stats['book'] = len(book)
+
+        if not chosen:
+            return valid_moves
+        stats['evaluated'] = len(chosen)
+        return [legal[p] for p in sorted(chosen)]
 
     def _get_move_advanced(self, valid_moves: List[Tuple[int, int]]) -> Tuple[int, int, str]:
         """困难模式 - 深度分析"""
@@ -64,8 +252,8 @@ class AdvancedAI(GoAI):
         analyses = []
 
         # 对每个候选点进行深入评估
-        for x, y in valid_moves:
-            score, analysis = self._evaluate_move_deep(x, y)
+        evaluations = self._evaluate_moves(valid_moves, self._evaluate_move_deep)
+        for (x, y), (score, analysis) in zip(valid_moves, evaluations):
 
             # 添加随机性保持变化
             score += random.random() * 0.5
@@ -80,6 +268,26 @@ class AdvancedAI(GoAI):
         explanation = self._format_explanation(best_move[0], best_move[1], analyses[:3])
         return best_move[0], best_move[1], explanation
 
+    def _evaluate_moves(self, valid_moves: List[Tuple[int, int]], evaluate) -> List[Tuple[float, str]]:
+        """
+        逐个评估候选点，返回 [(分数, 分析)]
+
+        开局阶段没有打劫和超级劫时评估只取决于盘面，按对称规范化的局面缓存，
+        旋转/翻转后相同的局面直接取用已有结果
+        """
+        board = self.board
+        if board.ko_point is not None or board.superko or len(board.move_history) > EVALUATION_CACHE_MOVES:
+            return [evaluate(x, y) for x, y in valid_moves]
+        view = evaluation_cache.view(board, self.player, self.difficulty, self.game_phase)
+        evaluations = []
+        for x, y in valid_moves:
+            cached = view.get(x, y)
+            if cached is None:
+                cached = evaluate(x, y)
+                view.put(x, y, *cached)
+            evaluations.append(cached)
+        return evaluations
+
     def _evaluate_move_deep(self, x: int, y: int) -> Tuple[float, str]:
         """深度评估某个落子"""
         score = 0
@@ -175,7 +383,7 @@ class AdvancedAI(GoAI):
                 return score, "好点"
 
             # 第三线、第四线加分
-            line = min(x, y, size - 1 - x, size - 1 - y)
+            line = self.board.tables.line[self.board.index(x, y)]
             if 2 <= line <= 4:
                 score += 12
                 return score, "第三、四线"
@@ -219,7 +427,7 @@ class AdvancedAI(GoAI):
         efficiency = self._calculate_efficiency(x, y)
         score += efficiency
         if efficiency > 12:
-            return score, f"高效率{effiveness:.0f}分"
+            return score, f"高效率{efficiency:.0f}分"
 
         return score, ""
 
@@ -245,227 +453,87 @@ class AdvancedAI(GoAI):
         return territory, f"控制{territory:.0f}目"
 
     def _can_capture_stones(self, x: int, y: int) -> Tuple[bool, int]:
-        """检查是否能提吃对方棋子"""
-        import copy
-        temp_board = copy.deepcopy(self.board.board)
-        temp_board[y][x] = self.player
-
-        captured = []
-        opponent = self.opponent
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                if temp_board[ny][nx] == opponent:
-                    if not self._has_liberty_board(temp_board, nx, ny, opponent):
-                        group = self._get_group_board(temp_board, nx, ny, opponent)
-                        captured.extend(group)
-
-        return len(captured) > 0, len(captured)
+        """检查是否能提吃对方棋子（相邻的对方棋串只剩这一口气）"""
+        captured = self.features.capture_points.get(self.board.index(x, y), 0)
+        return captured > 0, captured
 
     def _can_save_stones(self, x: int, y: int) -> Tuple[bool, int]:
-        """检查是否能救己方棋子"""
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-        saved_count = 0
-
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                if self.board.board[ny][nx] == self.player:
-                    # 检查这个棋子组是否只有1口气
-                    liberties = self._count_group_liberties_board(nx, ny, self.player)
-                    if liberties == 1:
-                        saved_count += len(self._get_group(nx, ny, self.player))
-
+        """检查是否能救己方棋子（在己方被叫吃棋串的最后一口气上长出）"""
+        saved_count = self.features.save_points.get(self.board.index(x, y), 0)
         return saved_count > 0, saved_count
 
     def _will_be_captured(self, x: int, y: int) -> bool:
-        """检查落子后是否会被立即提吃"""
-        import copy
-        temp_board = copy.deepcopy(self.board.board)
-        temp_board[y][x] = self.player
-
-        # 检查自己这组棋的气
-        if not self._has_liberty_board(temp_board, x, y, self.player):
-            # 除非能提吃对方
-            captured = 0
-            opponent = self.opponent
-            directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-            for dx, dy in directions:
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                    if temp_board[ny][nx] == opponent:
-                        if not self._has_liberty_board(temp_board, nx, ny, opponent):
-                            captured += 1
-
-            return captured == 0
-
-        return False
-
-    def _has_liberty_board(self, board: List[List[int]], x: int, y: int, player: int) -> bool:
-        """检查指定棋盘上某位置是否有气"""
-        group = self._get_group_board(board, x, y, player)
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for gx, gy in group:
-            for dx, dy in directions:
-                nx, ny = gx + dx, gy + dy
-                if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                    if board[ny][nx] == 0:
-                        return True
-        return False
-
-    def _get_group_board(self, board: List[List[int]], x: int, y: int, player: int) -> Set[Tuple[int, int]]:
-        """获取指定棋盘上的棋子组"""
-        group = set()
-        stack = [(x, y)]
-        visited = set()
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        while stack:
-            cx, cy = stack.pop()
-            if (cx, cy) in visited:
-                continue
-            visited.add((cx, cy))
-
-            if 0 <= cx < self.board.size and 0 <= cy < self.board.size and board[cy][cx] == player:
-                group.add((cx, cy))
-                for dx, dy in directions:
-                    stack.append((cx + dx, cy + dy))
-
-        return group
-
-    def _count_group_liberties_board(self, x: int, y: int, player: int) -> int:
-        """计算棋子组的气数"""
-        group = self._get_group(x, y, player)
-        liberties = set()
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for gx, gy in group:
-            for dx, dy in directions:
-                nx, ny = gx + dx, gy + dy
-                if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                    if self.board.board[ny][nx] == 0:
-                        liberties.add((nx, ny))
-
-        return len(liberties)
+        """检查落子后是否会被立即提吃（落子后无气且不能提子，即自杀）"""
+        return not self.board.is_valid_move(x, y, self.player)
 
     def _can_cut(self, x: int, y: int) -> bool:
         """检查是否能切断对方"""
-        enemy_neighbors = []
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                if self.board.board[ny][nx] == self.opponent:
-                    enemy_neighbors.append((nx, ny))
+        board = self.board
+        p = board.index(x, y)
+        features = self.features
+        if features.adjacent[self.opponent][p] < 2:
+            return False
 
         # 如果有多个对方棋子，且它们不在同一组
-        if len(enemy_neighbors) >= 2:
-            groups = set()
-            for nx, ny in enemy_neighbors:
-                group = frozenset(self._get_group(nx, ny, self.opponent))
-                groups.add(group)
-            return len(groups) >= 2
-
-        return False
+        cells = board.cells
+        chain_id = features.chain_id
+        groups = {chain_id[q] for q in board.tables.neighbors[p] if cells[q] == self.opponent}
+        return len(groups) >= 2
 
     def _can_connect(self, x: int, y: int) -> bool:
         """检查是否能连接己方"""
-        friendly_neighbors = 0
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        return self._count_adjacent(x, y, self.player) >= 2
 
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                if self.board.board[ny][nx] == self.player:
-                    friendly_neighbors += 1
-
-        return friendly_neighbors >= 2
+    def _count_adjacent(self, x: int, y: int, player: int) -> int:
+        """统计相邻点中某一方的棋子数"""
+        return self.features.adjacent[player][self.board.index(x, y)]
 
     def _is_ladder(self, x: int, y: int) -> bool:
-        """简化版征子检查"""
-        # 检查是否有对方的征子模式
-        return False  # 简化实现
+        """在(x, y)落子后这块棋是否会被对方征吃"""
+        board = self.board
+        features = self.features
+        p = board.index(x, y)
+        # 三个以上相邻空点，落子后至少三口气，不可能被征
+        empty = len(board.tables.neighbors[p]) - features.adjacent[1][p] - features.adjacent[2][p]
+        if empty >= 3:
+            return False
+        return ladder_reader.captures_after(board, x, y, self.player, features.probe)
 
     def _is_corner_star(self, x: int, y: int) -> bool:
         """检查是否是角星位"""
-        size = self.board.size
-        if size == 19:
-            corner_stars = [(3, 3), (3, 15), (15, 3), (15, 15)]
-            return (x, y) in corner_stars
-        elif size == 13:
-            corner_stars = [(3, 3), (3, 9), (9, 3), (9, 9)]
-            return (x, y) in corner_stars
-        return False
+        return self.board.index(x, y) in self.board.tables.corner_stars
 
     def _is_side_star(self, x: int, y: int) -> bool:
         """检查是否是边星位"""
-        size = self.board.size
-        if size == 19:
-            side_stars = [(9, 3), (9, 15), (3, 9), (15, 9)]
-            return (x, y) in side_stars
-        elif size == 13:
-            side_stars = [(6, 3), (6, 9), (3, 6), (9, 6)]
-            return (x, y) in side_stars
-        return False
+        return self.board.index(x, y) in self.board.tables.side_stars
 
     def _is_good_opening_point(self, x: int, y: int) -> bool:
-        """检查是否是好开局点"""
-        size = self.board.size
-        if size == 19:
-            # 小目、目外等
-            good_points = [(2, 3), (3, 2), (2, 15), (15, 2), (16, 3), (3, 16), (16, 15), (15, 16)]
-            return (x, y) in good_points
-        return False
+        """检查是否是好开局点（小目等）"""
+        return self.board.index(x, y) in self.board.tables.opening_points
 
     def _near_enemy_stones(self, x: int, y: int, distance: int = 2) -> bool:
         """检查是否靠近对方棋子"""
-        for dx in range(-distance, distance + 1):
-            for dy in range(-distance, distance + 1):
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                    if self.board.board[ny][nx] == self.opponent:
-                        return True
-        return False
+        p = self.board.index(x, y)
+        density = self.features.density[self.opponent]
+        return any(density[d][p] for d in range(1, distance + 1))
 
     def _makes_good_shape(self, x: int, y: int) -> bool:
         """检查是否形成好形"""
         # 检查是否能形成良好的连接
-        friendly = 0
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                if self.board.board[ny][nx] == self.player:
-                    friendly += 1
-
         # 形成竹节等好形
-        return friendly >= 2
+        return self._count_adjacent(x, y, self.player) >= 2
 
     def _makes_bad_shape(self, x: int, y: int) -> bool:
         """检查是否形成愚形"""
         # 简化检查：避免空三角等
-        friendly_count = 0
-        diagonal_count = 0
+        features = self.features
+        p = self.board.index(x, y)
 
         # 检查相邻
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                if self.board.board[ny][nx] == self.player:
-                    friendly_count += 1
+        friendly_count = features.adjacent[self.player][p]
 
         # 检查对角
-        for dx, dy in [(1, 1), (1, -1), (-1, 1), (-1, -1)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                if self.board.board[ny][nx] == self.player:
-                    diagonal_count += 1
+        diagonal_count = features.diagonal[self.player][p]
 
         # 空三角：相邻2子+对角1子
         if friendly_count == 2 and diagonal_count >= 1:
@@ -475,34 +543,25 @@ class AdvancedAI(GoAI):
 
     def _calculate_efficiency(self, x: int, y: int) -> float:
         """计算落子效率"""
-        # 基于影响力范围
+        # 基于影响力范围：半径r的窗口 = 距离不超过r的各圈之和
+        p = self.board.index(x, y)
+        own = self.features.density[self.player]
+        enemy = self.features.density[self.opponent]
         efficiency = 0
-        for r in range(1, 4):
-            influence_count = 0
-            for dx in range(-r, r + 1):
-                for dy in range(-r, r + 1):
-                    nx, ny = x + dx, y + dy
-                    if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                        if self.board.board[ny][nx] == self.player:
-                            influence_count += 1
-                        elif self.board.board[ny][nx] == self.opponent:
-                            influence_count += 0.5
+        influence_count = 0
+        for r in range(1, MAX_RADIUS + 1):
+            influence_count += own[r][p] + enemy[r][p] * 0.5
             efficiency += influence_count / r
 
         return efficiency
 
     def _calculate_thickness(self, x: int, y: int) -> float:
         """计算厚势"""
+        p = self.board.index(x, y)
+        own = self.features.density[self.player]
         thickness = 0
-        for dx in range(-3, 4):
-            for dy in range(-3, 4):
-                if dx == 0 and dy == 0:
-                    continue
-                nx, ny = x + dx, y + dy
-                if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                    if self.board.board[ny][nx] == self.player:
-                        dist = max(abs(dx), abs(dy))
-                        thickness += (4 - dist) / 2
+        for dist in range(1, MAX_RADIUS + 1):
+            thickness += own[dist][p] * (4 - dist) / 2
 
         return thickness
 
@@ -513,23 +572,24 @@ class AdvancedAI(GoAI):
 
     def _estimate_territory_control(self, x: int, y: int) -> float:
         """估算领地控制"""
+        board = self.board
+        cells = board.cells
         territory = 0
-        checked = set()
-        stack = [(x, y)]
-
-        while stack and len(checked) < 20:
-            cx, cy = stack.pop()
-            if (cx, cy) in checked:
-                continue
-            checked.add((cx, cy))
-
-            if not (0 <= cx < self.board.size and 0 <= cy < self.board.size):
-                continue
-
-            if self.board.board[cy][cx] == 0:
+        frontier = [board.index(x, y)]
+        checked = set(frontier)
+
+        # 按距离逐层扩展，整层处理完才判断上限，结果与棋盘方向无关（对称局面可共用缓存）
+        while frontier and len(checked) < 20:
+            layer, frontier = frontier, []
+            for p in layer:
+                if cells[p] != 0:
+                    continue
                 territory += 1
-                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    stack.append((cx + dx, cy + dy))
+                for d in board.neighbor_offsets:
+                    q = p + d
+                    if q not in checked:
+                        checked.add(q)
+                        frontier.append(q)
 
         return territory
 
@@ -539,38 +599,20 @@ class AdvancedAI(GoAI):
         value = 5
 
         # 靠近边界更有价值
-        edge_dist = min(x, y, self.board.size - 1 - x, self.board.size - 1 - y)
+        edge_dist = self.board.tables.line[self.board.index(x, y)]
         if edge_dist <= 2:
             value += 5
 
         # 靠近己方棋子
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.board.size and 0 <= ny < self.board.size:
-                if self.board.board[ny][nx] == self.player:
-                    value += 3
+        value += 3 * self._count_adjacent(x, y, self.player)
 
         return value
 
     def _get_group(self, x: int, y: int, player: int) -> Set[Tuple[int, int]]:
         """获取棋子组"""
-        group = set()
-        stack = [(x, y)]
-        visited = set()
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        while stack:
-            cx, cy = stack.pop()
-            if (cx, cy) in visited:
-                continue
-            visited.add((cx, cy))
-
-            if 0 <= cx < self.board.size and 0 <= cy < self.board.size and self.board.board[cy][cx] == player:
-                group.add((cx, cy))
-                for dx, dy in directions:
-                    stack.append((cx + dx, cy + dy))
-
-        return group
+        if self.board.get(x, y) != player:
+            return set()
+        return self.board.get_group(x, y)
 
     def _format_explanation(self, x: int, y: int, analyses: List[str]) -> str:
         """格式化解释"""
@@ -585,25 +627,8 @@ class AdvancedAI(GoAI):
         best_score = -float('inf')
         best_move = valid_moves[0]
 
-        for x, y in valid_moves:
-            score = 0
-
-            # 简化评估
-            if self._can_capture_stones(x, y)[0]:
-                score += 25
-            if self._can_save_stones(x, y)[0]:
-                score += 20
-            if self._will_be_captured(x, y):
-                score -= 40
-            if self._can_cut(x, y):
-                score += 15
-            if self._can_connect(x, y):
-                score += 12
-
-            # 位置评分
-            position_score, _ = self._evaluate_position_advanced(x, y)
-            score += position_score * 0.8
-
+        evaluations = self._evaluate_moves(valid_moves, self._evaluate_move_medium)
+        for (x, y), (score, _) in zip(valid_moves, evaluations):
             score += random.random() * 3
 
             if score > best_score:
@@ -613,6 +638,26 @@ class AdvancedAI(GoAI):
         x, y = best_move
         return x, y, f"选择 ({x+1},{y+1})：综合评估后的最佳选择"
 
+    def _evaluate_move_medium(self, x: int, y: int) -> Tuple[float, None]:
+        """中等模式的简化评估（不含随机项）"""
+        score = 0
+
+        if self._can_capture_stones(x, y)[0]:
+            score += 25
+        if self._can_save_stones(x, y)[0]:
+            score += 20
+        if self._will_be_captured(x, y):
+            score -= 40
+        if self._can_cut(x, y):
+            score += 15
+        if self._can_connect(x, y):
+            score += 12
+
+        # 位置评分
+        position_score, _ = self._evaluate_position_advanced(x, y)
+        score += position_score * 0.8
+        return score, None
+
     def _get_move_simple(self, valid_moves: List[Tuple[int, int]]) -> Tuple[int, int, str]:
         """简单模式"""
         # 30%概率随机
@@ -650,4 +695,7 @@ class AdvancedAI(GoAI):
 
 def create_ai(board: GoBoard, player: int, difficulty: str = "medium") -> GoAI:
     """创建AI实例的工厂函数"""
+    if difficulty == "mcts":
+        from .mcts import MCTSAI
+        return MCTSAI(board, player, difficulty)
     return AdvancedAI(board, player, difficulty)
@@ -1,381 +1,993 @@
 """
 围棋棋盘和游戏逻辑实现
 完全符合中国围棋规则的实现
+
+棋盘内部使用带哨兵边框的一维数组：(size+2)^2 个格子，最外一圈为 BORDER，
+相邻点通过固定偏移量（±1, ±stride）访问，无需边界检查。
 """
 
-from typing import List, Tuple, Optional, Set
-import copy
+import random
+from itertools import compress
+from typing import Callable, Dict, Iterable, List, Tuple, Optional, Set
+
+from .board_tables import SYMMETRIES, get_tables
+from .move_history import MoveHistory, SNAPSHOT_INTERVAL
+
+EMPTY = 0
+BLACK = 1
+WHITE = 2
+BORDER = 3  # 棋盘外的哨兵格
+PASS = -1   # 撤销记录中表示虚着
+
+# 可选的规则引擎实现："list" 为棋串增量维护，"bitboard" 为位棋盘（见 bitboard.py）
+ENGINES = ("list", "bitboard")
+
+# 贴目（中国规则，数子法）
+KOMI = 6.5
+
+# 可订阅的追踪事件，见 GoBoard.subscribe
+TRACE_EVENTS = ("place", "capture", "ko")
+
+# Zobrist随机数表：按棋盘大小缓存，所有对局共享。固定种子保证不同进程间哈希一致
+_ZOBRIST_SEED = 0x60B0A2D
+_ZOBRIST_TURN = random.Random(_ZOBRIST_SEED).getrandbits(64)  # 白方行棋时异或
+_HASH_MASK = (1 << 64) - 1
+_zobrist_tables: Dict[int, tuple] = {}
+_symmetric_zobrist_tables: Dict[int, tuple] = {}
+
+
+def _zobrist_table(size: int) -> tuple:
+    """获取某个棋盘大小的Zobrist表，按颜色索引：table[color][p]"""
+    table = _zobrist_tables.get(size)
+    if table is None:
+        rng = random.Random(_ZOBRIST_SEED + size)
+        cell_count = (size + 2) * (size + 2)
+        table = (None,
+                 [rng.getrandbits(64) for _ in range(cell_count)],
+                 [rng.getrandbits(64) for _ in range(cell_count)])
+        _zobrist_tables[size] = table
+    return table
+
+
+def _symmetric_zobrist_table(size: int) -> tuple:
+    """
+    对称Zobrist表：table[color][p] 的第t个64位段是p经第t种对称变换后的点的Zobrist值，
+    按位异或时8个段互不影响，一次异或同时更新8个变换后盘面的哈希
+    """
+    table = _symmetric_zobrist_tables.get(size)
+    if table is None:
+        zobrist = _zobrist_table(size)
+        symmetries = get_tables(size).symmetries
+        table = (None,) + tuple(
+            [sum(keys[perm[p]] << 64 * t for t, perm in enumerate(symmetries)) for p in range(len(keys))]
+            for keys in zobrist[1:])
+        _symmetric_zobrist_tables[size] = table
+    return table
+
+
+# 每个字节解包成4个交叉点
+_UNPACK = [bytes((b >> 6 & 3, b >> 4 & 3, b >> 2 & 3, b & 3)) for b in range(256)]
+
+
+def pack_points(values: bytes) -> bytes:
+    """
+    紧凑盘面编码：每个交叉点2位（0空 1黑 2白），每字节4个点，高位在前，
+    按行优先顺序，末尾不足4个点补0。19路盘面为91字节
+    """
+    values = bytes(values) + bytes(-len(values) % 4)
+    return bytes(a << 6 | b << 4 | c << 2 | d
+                 for a, b, c, d in zip(values[0::4], values[1::4], values[2::4], values[3::4]))
+
+
+def unpack_points(data: bytes, count: int) -> bytes:
+    """pack_points 的逆运算，返回前count个交叉点的状态"""
+    return b''.join([_UNPACK[b] for b in data])[:count]
+
+
+class _Chain:
+    """棋串：同色相连的棋子及其气（增量维护）"""
+
+    __slots__ = ('color', 'stones', 'liberties')
+
+    def __init__(self, color: int):
+        self.color = color
+        self.stones = []        # 棋串中的棋子（一维索引）
+        self.liberties = set()  # 棋串的气（一维索引）
 
 
 class GoBoard:
     """围棋棋盘类 - 工业级实现"""
 
-    def __init__(self, size: int = 19):
+    # 每局常驻内存，使用 __slots__ 省去实例字典
+    __slots__ = ('size', 'engine', 'stride', 'cells', 'neighbor_offsets', 'tables', 'points',
+                 'current_player', 'move_history', 'captured_black', 'captured_white',
+                 'ko_point', 'last_move', 'komi', '_chains', '_low', '_legal', '_dirty', '_zobrist',
+                 '_hash', '_sym_zobrist', '_sym_hash', 'superko', '_hash_history', '_tracers')
+    # 所有字段（子类追加自己的 __slots__），浅复制时逐个复制
+    _FIELDS = __slots__
+
+    def __new__(cls, size: int = 19, superko: bool = False, engine: str = "list"):
+        if engine not in ENGINES:
+            raise ValueError(f"未知的棋盘引擎: {engine}")
+        if cls is GoBoard and engine == "bitboard":
+            from .bitboard import BitboardGoBoard
+            cls = BitboardGoBoard
+        return super().__new__(cls)
+
+    def __init__(self, size: int = 19, superko: bool = False, engine: str = "list"):
         self.size = size
-        self.board = [[0 for _ in range(size)] for _ in range(size)]  # 0: 空, 1: 黑, 2: 白
+        self.engine = engine
+        self.stride = size + 2
+        # 0: 空, 1: 黑, 2: 白, 3: 边框
+        self.cells = bytearray([BORDER]) * (self.stride * self.stride)
+        for y in range(size):
+            start = self.index(0, y)
+            self.cells[start:start + size] = bytes(size)
+        # 相邻点偏移量：右、左、下、上
+        self.neighbor_offsets = (1, -1, self.stride, -self.stride)
+        # 按棋盘大小共享的预计算表（相邻点、窗口、星位等）
+        self.tables = get_tables(size)
+        # 所有棋盘内交叉点的一维索引（按行优先顺序）
+        self.points = self.tables.points
+
         self.current_player = 1  # 1: 黑棋先手
-        self.move_history = []
+        # 按列存储的紧凑历史，同时保存撤销所需的提子和打劫信息
+        self.move_history = MoveHistory(self.stride)
         self.captured_black = 0
         self.captured_white = 0
         self.ko_point = None  # 打劫点
         self.last_move = None
+        self.komi = KOMI
+
+        # 每个交叉点所属的棋串（空点和边框为None），落子和提子时增量更新
+        self._chains = [None] * len(self.cells)
+        # 气数不超过2的棋串（被叫吃和只剩两口气的），随棋串的气一起增量维护
+        self._low = set()
+
+        # 按颜色索引的合法点掩码（按一维索引，1为合法，不含打劫/超级劫判断），
+        # 只在查询时重算可能变化的点：_dirty 记录自上次查询以来状态改变过的交叉点
+        legal = bytearray(len(self.cells))
+        for p in self.points:
+            legal[p] = 1
+        self._legal = [None, legal, bytearray(legal)]
+        self._dirty = [None, set(), set()]
+
+        # Zobrist哈希：只包含盘面棋子，落子和提子时增量更新
+        self._zobrist = _zobrist_table(size)
+        self._hash = 0
+        # 8种对称变换下的盘面哈希拼成一个512位整数（第t段为变换t之后盘面的哈希），
+        # 和 _hash 一样每个棋子变化时异或一次，用于对称规范化的局面键，见 canonical_key
+        self._sym_zobrist = _symmetric_zobrist_table(size)
+        self._sym_hash = 0
+        # 启用局面超级劫规则时，禁止重复出现历史上的任何盘面。
+        # 盘面哈希 -> 出现次数，只在启用超级劫时维护（各手的哈希另存于落子历史）
+        self.superko = superko
+        self._hash_history = {self._hash: 1} if superko else None
+
+        # 追踪事件订阅：事件名 -> 回调列表。没有订阅者时为None，落子热路径只多一次判断
+        self._tracers = None
+
+    @property
+    def position_hash(self) -> int:
+        """当前局面的64位哈希（盘面 + 轮到哪一方）"""
+        if self.current_player == WHITE:
+            return self._hash ^ _ZOBRIST_TURN
+        return self._hash
+
+    def symmetric_hashes(self) -> List[int]:
+        """8种对称变换后局面的position_hash，第t个对应 transform_point 的第t种变换"""
+        turn = _ZOBRIST_TURN if self.current_player == WHITE else 0
+        packed = self._sym_hash
+        return [(packed >> 64 * t & _HASH_MASK) ^ turn for t in range(SYMMETRIES)]
+
+    def canonical_key(self) -> Tuple[int, int]:
+        """
+        对称规范化的局面键：(8个对称局面中最小的哈希, 把本局面变换到该规范形式的变换编号)
+
+        互为旋转/翻转的局面得到相同的键，可以共用缓存；
+        缓存中的坐标按变换编号用 transform_point / inverse_symmetry 换算
+        """
+        hashes = self.symmetric_hashes()
+        key = min(hashes)
+        return key, hashes.index(key)
+
+    def index(self, x: int, y: int) -> int:
+        """坐标转换为一维索引"""
+        return (y + 1) * self.stride + x + 1
+
+    def coords(self, p: int) -> Tuple[int, int]:
+        """一维索引转换为坐标"""
+        row, col = divmod(p, self.stride)
+        return col - 1, row - 1
+
+    def get(self, x: int, y: int) -> int:
+        """读取某个交叉点的状态"""
+        return self.cells[(y + 1) * self.stride + x + 1]
+
+    def copy(self) -> 'GoBoard':
+        """复制当前局面（包括棋串、提子数、打劫点和历史）"""
+        other = self._clone()
+        # 副本用于试探和分析，不继承订阅者
+        other._tracers = None
+        self._copy_state(other)
+        return other
+
+    def _clone(self) -> 'GoBoard':
+        """浅复制全部字段（可变状态仍与self共用）"""
+        other = object.__new__(type(self))
+        for name in self._FIELDS:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def snapshot(self) -> 'GoBoard':
+        """
+        供分析接口和AI试探使用的局面副本，与 copy() 相同
+
+        调用方拿到快照后都会马上落子，而一手棋同时改动盘面、棋串、合法点掩码和历史，
+        写时复制省不下任何复制，所以直接复制
+        """
+        return self.copy()
+
+    # release() 丢弃的派生结构，都可以由盘面重建
+    _DERIVED = ('_chains', '_low', '_legal', '_dirty')
 
-    def is_valid_move(self, x: int, y: int) -> bool:
-        """检查落子是否合法"""
+    def release(self):
+        """
+        空闲时释放棋串、低气索引和合法点缓存，只留盘面、历史和哈希（19路一局约占用的内存从50多KB降到几KB）
+
+        下次访问这些结构时由 __getattr__ 从盘面重建，调用方不需要关心棋盘是否释放过
+        """
+        if self.engine != "list":
+            return  # 位棋盘没有这些结构
+        for name in self._DERIVED:
+            try:
+                delattr(self, name)
+            except AttributeError:
+                pass  # 已经释放过
+
+    def __getattr__(self, name: str):
+        # 只有未赋值的槽位才会走到这里：release() 之后第一次访问派生结构时重建
+        if name in GoBoard._DERIVED:
+            self._rebuild_chains()
+            return object.__getattribute__(self, name)
+        raise AttributeError(name)
+
+    def _rebuild_chains(self):
+        """由盘面重建棋串和低气索引，合法点掩码全部标记为待重算"""
+        cells = self.cells
+        self._chains = [None] * len(cells)
+        self._low = set()
+        for p in self.points:
+            if cells[p] in (BLACK, WHITE) and self._chains[p] is None:
+                self._build_chain(p)
+        legal = bytearray(len(cells))
+        self._legal = [None, legal, bytearray(legal)]
+        self._dirty = [None, set(self.points), set(self.points)]
+
+    def _copy_state(self, other: 'GoBoard'):
+        """把可变状态复制给other（other的其余属性已与self相同）"""
+        other.cells = bytearray(self.cells)
+        other.move_history = self.move_history.copy()
+        if self._hash_history is not None:
+            other._hash_history = dict(self._hash_history)
+        self._copy_chains(other)
+
+    def _copy_chains(self, other: 'GoBoard'):
+        """为副本复制棋串结构和合法点缓存"""
+        other._legal = [None, bytearray(self._legal[1]), bytearray(self._legal[2])]
+        other._dirty = [None, set(self._dirty[1]), set(self._dirty[2])]
+        other._chains = [None] * len(self.cells)
+        copied = {}
+        for p in self.points:
+            chain = self._chains[p]
+            if chain is None:
+                continue
+            clone = copied.get(id(chain))
+            if clone is None:
+                clone = _Chain(chain.color)
+                clone.stones = list(chain.stones)
+                clone.liberties = set(chain.liberties)
+                copied[id(chain)] = clone
+            other._chains[p] = clone
+        other._low = {copied[id(chain)] for chain in self._low}
+
+    def is_valid_move(self, x: int, y: int, player: Optional[int] = None) -> bool:
+        """
+        检查落子是否合法（player默认为当前行棋方）
+
+        与 _legal_moves / legal_mask 一致，打劫和超级劫只对当前行棋方生效：
+        劫点是对方刚提子留下的，替不在行棋的一方查询（如SGF中同一方连走）时不适用
+        """
         # 基本边界检查
         if not (0 <= x < self.size and 0 <= y < self.size):
             return False
 
-        # 位置必须为空
-        if self.board[y][x] != 0:
-            return False
+        to_move = player is None or player == self.current_player
+        if player is None:
+            player = self.current_player
 
         # 打劫规则
-        if self.ko_point and (x, y) == self.ko_point:
+        if to_move and self.ko_point and (x, y) == self.ko_point:
             return False
 
-        # 创建临时棋盘测试落子
-        temp_board = [row[:] for row in self.board]
-        temp_board[y][x] = self.current_player
-
-        # 检查是否能提对方的子
-        opponent = 3 - self.current_player
-        can_capture = self._can_capture_anything(temp_board, x, y, opponent)
+        p = self.index(x, y)
+        if not self._is_legal(p, player):
+            return False
 
-        # 如果不能提子，检查自己是否有气（禁止自杀）
-        if not can_capture:
-            if not self._has_any_liberty(temp_board, x, y, self.current_player):
-                return False
+        # 局面超级劫：落子（含提子）后的盘面不能与历史盘面相同
+        if to_move and self.superko and self._hash_after(p, player) in self._hash_history:
+            return False
 
         return True
 
-    def _can_capture_anything(self, board: List[List[int]], x: int, y: int, opponent: int) -> bool:
+    def _hash_after(self, p: int, player: int) -> int:
+        """计算在索引p落子（并提掉无气的对方棋串）之后的盘面哈希"""
+        zobrist = self._zobrist
+        opponent = 3 - player
+        h = self._hash ^ zobrist[player][p]
+        captured = set()
+        for d in self.neighbor_offsets:
+            q = p + d
+            if self.cells[q] == opponent and q not in captured and self.liberty_count(q) == 1:
+                for s in self.chain_stones(q):
+                    captured.add(s)
+                    h ^= zobrist[opponent][s]
+        return h
+
+    def _is_legal(self, p: int, player: int) -> bool:
         """
-        检查落子后能否提吃对方的子
+        检查在索引p落子是否合法（不含打劫判断）
 
-        关键：检查对方棋组是否有气时，必须排除当前落子位置(x,y)！
+        只需查看相邻点及其棋串的气数：有空点、能提吃对方（对方棋串只剩这一口气）、
+        或连上气数大于1的己方棋串，都不是自杀
         """
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        cells = self.cells
+        if cells[p] != EMPTY:
+            return False
 
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < self.size and 0 <= ny < self.size:
-                if board[ny][nx] == opponent:
-                    # 获取对方棋子组
-                    group = self._get_group_at(board, nx, ny, opponent)
-                    # 检查这个组是否有气（排除当前落子位置）
-                    # 因为我们将在(x,y)落子，对方不能利用这个位置作为气
-                    if not self._group_has_liberty_excluding(board, group, opponent, x, y):
-                        return True
+        for d in self.neighbor_offsets:
+            q = p + d
+            c = cells[q]
+            if c == EMPTY:
+                return True
+            if c == BORDER:
+                continue
+            liberties = len(self._chains[q].liberties)
+            if c == player:
+                if liberties > 1:
+                    return True
+            elif liberties == 1:
+                return True
 
         return False
 
-    def _has_any_liberty(self, board: List[List[int]], x: int, y: int, player: int) -> bool:
-        """检查某个位置的棋子组是否有气"""
-        group = self._get_group_at(board, x, y, player)
-        return self._group_has_liberty(board, group, player)
-
-    def _group_has_liberty_excluding(self, board: List[List[int]], group: Set[Tuple[int, int]],
-                                    player: int, exclude_x: int, exclude_y: int) -> bool:
-        """检查棋子组是否有气（排除指定位置）"""
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for gx, gy in group:
-            for dx, dy in directions:
-                nx, ny = gx + dx, gy + dy
-                # 排除当前落子位置
-                if (nx, ny) == (exclude_x, exclude_y):
-                    continue
-                if 0 <= nx < self.size and 0 <= ny < self.size:
-                    if board[ny][nx] == 0:
-                        return True
-        return False
+    def chain_stones(self, p: int) -> List[int]:
+        """获取索引p所在棋串的全部棋子（一维索引）"""
+        chain = self._chains[p]
+        return list(chain.stones) if chain is not None else []
 
-    def _group_has_liberty(self, board: List[List[int]], group: Set[Tuple[int, int]], player: int) -> bool:
-        """检查棋子组是否有气"""
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+    def liberty_count(self, p: int) -> int:
+        """获取索引p所在棋串的气数"""
+        chain = self._chains[p]
+        return len(chain.liberties) if chain is not None else 0
 
-        for gx, gy in group:
-            for dx, dy in directions:
-                nx, ny = gx + dx, gy + dy
-                if 0 <= nx < self.size and 0 <= ny < self.size:
-                    if board[ny][nx] == 0:
-                        return True
-        return False
+    def chain_liberties(self, p: int) -> List[int]:
+        """获取索引p所在棋串的气（一维索引，升序）"""
+        chain = self._chains[p]
+        return sorted(chain.liberties) if chain is not None else []
 
-    def _get_group_at(self, board: List[List[int]], x: int, y: int, player: int, debug=False) -> Set[Tuple[int, int]]:
+    def low_liberty_chains(self, color: int, max_liberties: int = 2) -> List[Tuple[List[int], List[int]]]:
         """
-        获取相连的棋子组
-        使用优化的Flood Fill算法
-        """
-        if board[y][x] != player:
-            if debug:
-                print(f"[GROUP DEBUG] 起点({x},{y})不是{player}方棋子")
-            return set()
-
-        group = set()
-        stack = [(x, y)]
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+        color方气数不超过max_liberties（最多2）的棋串：[(棋子, 气)]，按最小棋子索引排序
 
-        iteration = 0
-        while stack:
-            iteration += 1
-            cx, cy = stack.pop()
-
-            if (cx, cy) in group:
-                if debug and iteration <= 20:
-                    print(f"[GROUP DEBUG] 跳过已处理位置: ({cx},{cy})")
+        直接读取增量维护的索引，不需要遍历棋盘
+        """
+        found = [(sorted(chain.stones), sorted(chain.liberties)) for chain in self._low
+                 if chain.color == color and len(chain.liberties) <= max_liberties]
+        found.sort()
+        return found
+
+    def atari_points(self, color: int) -> Dict[int, int]:
+        """color方被叫吃的棋串的最后一口气 -> 在这口气上长出能救回的棋子数"""
+        points: Dict[int, int] = {}
+        for stones, liberties in self.low_liberty_chains(color, 1):
+            points[liberties[0]] = points.get(liberties[0], 0) + len(stones)
+        return points
+
+    def _index_chain(self, chain: _Chain):
+        """按气数把棋串放入或移出低气索引（已被合并或提走的棋串一律移出）"""
+        if len(chain.liberties) <= 2 and self._chains[chain.stones[0]] is chain:
+            self._low.add(chain)
+        else:
+            self._low.discard(chain)
+
+    def get_group(self, x: int, y: int) -> Set[Tuple[int, int]]:
+        """获取相连的棋子组（直接读取增量维护的棋串）"""
+        return {self.coords(p) for p in self.chain_stones(self.index(x, y))}
+
+    def count_liberties(self, x: int, y: int) -> int:
+        """计算某个棋子所在棋串的气数"""
+        return self.liberty_count(self.index(x, y))
+
+    def _add_stone(self, p: int, player: int):
+        """在索引p放置棋子，合并相邻的己方棋串并更新相邻棋串的气"""
+        cells = self.cells
+        chains = self._chains
+        cells[p] = player
+        self._hash ^= self._zobrist[player][p]
+        self._sym_hash ^= self._sym_zobrist[player][p]
+        self._dirty[1].add(p)
+        self._dirty[2].add(p)
+
+        # 对方棋串只会少气，己方被并走的棋串移出低气索引，合并后的棋串最后重新归类
+        low = self._low
+        chain = None
+        for d in self.neighbor_offsets:
+            neighbor = chains[p + d]
+            if neighbor is None:
                 continue
-
-            # 边界检查
-            if not (0 <= cx < self.size and 0 <= cy < self.size):
-                if debug and iteration <= 20:
-                    print(f"[GROUP DEBUG] 超出边界: ({cx},{cy})")
+            neighbor.liberties.discard(p)
+            if neighbor.color != player:
+                if len(neighbor.liberties) <= 2:
+                    low.add(neighbor)
                 continue
-
-            # 只处理相同颜色的棋子
-            if board[cy][cx] != player:
-                if debug and iteration <= 20:
-                    print(f"[GROUP DEBUG] 位置({cx},{cy})不是{player}方棋子，而是{board[cy][cx]}方")
+            if neighbor is chain:
                 continue
-
-            group.add((cx, cy))
-            if debug and iteration <= 20:
-                print(f"[GROUP DEBUG] 添加到组: ({cx},{cy}), 当前组大小: {len(group)}")
-
-            # 添加相邻位置
-            for dx, dy in directions:
-                nx, ny = cx + dx, cy + dy
-                if (nx, ny) not in group:
-                    stack.append((nx, ny))
-
-        if debug:
-            print(f"[GROUP DEBUG] 最终棋组: {group}, 大小: {len(group)}")
-        return group
+            if chain is None:
+                chain = neighbor
+                continue
+            # 小棋串并入大棋串，减少重新标记的棋子数
+            if len(neighbor.stones) > len(chain.stones):
+                chain, neighbor = neighbor, chain
+            for s in neighbor.stones:
+                chains[s] = chain
+            chain.stones.extend(neighbor.stones)
+            chain.liberties |= neighbor.liberties
+            low.discard(neighbor)
+
+        if chain is None:
+            chain = _Chain(player)
+        chain.stones.append(p)
+        chains[p] = chain
+        for d in self.neighbor_offsets:
+            if cells[p + d] == EMPTY:
+                chain.liberties.add(p + d)
+        if len(chain.liberties) <= 2:
+            low.add(chain)
+        else:
+            low.discard(chain)
+
+    def _remove_chain(self, chain: _Chain):
+        """从棋盘上移除整个棋串，并把这些位置还给相邻棋串作为气"""
+        cells = self.cells
+        chains = self._chains
+        keys = self._zobrist[chain.color]
+        sym_keys = self._sym_zobrist[chain.color]
+        for s in chain.stones:
+            cells[s] = EMPTY
+            chains[s] = None
+            self._hash ^= keys[s]
+            self._sym_hash ^= sym_keys[s]
+        self._dirty[1].update(chain.stones)
+        self._dirty[2].update(chain.stones)
+        self._low.discard(chain)
+        touched = set()
+        for s in chain.stones:
+            for d in self.neighbor_offsets:
+                neighbor = chains[s + d]
+                if neighbor is not None:
+                    neighbor.liberties.add(s)
+                    touched.add(neighbor)
+        for neighbor in touched:
+            self._index_chain(neighbor)
 
     def place_stone(self, x: int, y: int) -> Tuple[bool, str]:
         """落子"""
         if not self.is_valid_move(x, y):
             return False, "无效的落子位置"
 
-        # 记录打劫状态
-        old_ko = self.ko_point
+        record = self._play(self.index(x, y), self.current_player)
+        return True, f"落子成功，提子{len(record[2])}颗"
+
+    def play(self, x: int, y: int) -> Optional[tuple]:
+        """
+        当前行棋方在(x, y)落子，返回撤销记录；落子不合法时返回None
+
+        撤销记录交给undo()即可原地恢复局面，搜索和试探落子时无需复制棋盘
+        """
+        if not self.is_valid_move(x, y):
+            return None
+        return self._play(self.index(x, y), self.current_player)
+
+    def _play(self, p: int, player: int) -> tuple:
+        """在索引p落子（调用方已检查合法性），更新提子、打劫、哈希和历史"""
+        ko_point, last_move, current_player = self.ko_point, self.last_move, self.current_player
 
         # 落子
-        self.board[y][x] = self.current_player
-        opponent = 3 - self.current_player
+        opponent = 3 - player
+        self._add_stone(p, player)
 
         # 检查并提子
-        captured = self._find_and_capture_stones(x, y, opponent)
+        captured = self._find_and_capture_stones(p, opponent)
 
         # 更新提子统计
         if captured:
             captured_count = len(captured)
-            # 注意：opponent是被提子的一方
-            # 如果opponent是1(黑)，说明白棋提了黑子，白棋提子数增加
-            # 如果opponent是2(白)，说明黑棋提了白子，黑棋提子数增加
-            
-            # 这里之前的逻辑可能有误：
             # self.captured_black 记录的是黑棋提了多少子
             # self.captured_white 记录的是白棋提了多少子
-            
-            if self.current_player == 1: # 当前是黑棋落子
+            if player == 1: # 当前是黑棋落子
                 self.captured_black += captured_count
             else: # 当前是白棋落子
                 self.captured_white += captured_count
 
-            # 检查是否形成打劫
-            if captured_count == 1:
-                # 检查自己这组棋是否也只有一口气
-                my_group = self._get_group_at(self.board, x, y, self.current_player)
-                if self._count_liberties_of_group(self.board, my_group) == 1:
-                    self.ko_point = next(iter(captured))  # 获取集合中唯一的元素
-                else:
-                    self.ko_point = None
+            # 检查是否形成打劫：只提一子且自己这组棋也只有一口气
+            if captured_count == 1 and self.liberty_count(p) == 1:
+                self.ko_point = self.coords(captured[0])
             else:
                 self.ko_point = None
         else:
             self.ko_point = None
 
         # 记录历史
-        self.move_history.append({
-            'x': x,
-            'y': y,
-            'player': self.current_player,
-            'captured': len(captured)
-        })
+        x, y = self.coords(p)
         self.last_move = (x, y)
+        if self._hash_history is not None:
+            self._hash_history[self._hash] = self._hash_history.get(self._hash, 0) + 1
+        self._record(p, player, captured)
 
         # 切换玩家
         self.current_player = opponent
 
-        return True, f"落子成功，提子{len(captured)}颗"
+        if self._tracers is not None:
+            self._trace_play(x, y, player, captured)
+
+        return (p, player, tuple(captured), ko_point, last_move, current_player)
+
+    def _record(self, p: int, player: int, captured: List[int]):
+        """把一手写入历史，每隔若干手保存快照"""
+        ko = self.index(*self.ko_point) if self.ko_point else -1
+        history = self.move_history
+        history.append(p, player, captured, ko, self._hash)
+        if len(history) % SNAPSHOT_INTERVAL == 0:
+            history.add_snapshot(self.encode(), self.captured_black, self.captured_white, 3 - player)
+
+    def _last_record(self) -> tuple:
+        """由历史重建最后一手的撤销记录"""
+        history = self.move_history
+        n = len(history)
+        ko = history.ko[n - 2] if n > 1 else -1
+        last = history.last_point(n - 1)
+        player = history.players[n - 1]
+        return (history.points[n - 1], player, history.captured(n - 1),
+                self.coords(ko) if ko >= 0 else None,
+                self.coords(last) if last >= 0 else None,
+                player)
+
+    def undo(self, record: Optional[tuple] = None):
+        """
+        撤销最近一步（落子或虚着），恢复棋子、提子数、打劫点、行棋方和历史
 
-    def _find_and_capture_stones(self, x: int, y: int, opponent: int) -> Set[Tuple[int, int]]:
+        record必须是最近一步的撤销记录；省略时撤销最后一步。
+        所需信息都取自落子历史，不需要保留撤销记录
+        """
+        if not self.move_history:
+            raise ValueError("没有可以撤销的步骤")
+        last = self._last_record()
+        if record is not None and record != last:
+            raise ValueError("只能按落子顺序撤销")
+        self.move_history.pop()
+
+        p, player, captured, ko_point, last_move, current_player = last
+        if p != PASS:
+            history = self._hash_history
+            if history is not None:
+                count = history[self._hash] - 1
+                if count:
+                    history[self._hash] = count
+                else:
+                    del history[self._hash]
+            self._take_back(p, player, captured)
+            if player == 1:
+                self.captured_black -= len(captured)
+            else:
+                self.captured_white -= len(captured)
+
+        self.ko_point = ko_point
+        self.last_move = last_move
+        self.current_player = current_player
+
+    def _take_back(self, p: int, player: int, captured: Tuple[int, ...]):
+        """移除索引p的棋子并放回被提吃的对方棋子，局部重建受影响的棋串"""
+        cells = self.cells
+        chains = self._chains
+        opponent = 3 - player
+        stale = chains[p]
+
+        cells[p] = EMPTY
+        chains[p] = None
+        self._hash ^= self._zobrist[player][p]
+        self._sym_hash ^= self._sym_zobrist[player][p]
+        self._low.discard(stale)
+        touched = set()
+        for dirty in self._dirty[1:]:
+            dirty.add(p)
+            dirty.update(captured)
+
+        # 放回被提的棋子，它们重新占据相邻己方棋串的气
+        keys = self._zobrist[opponent]
+        sym_keys = self._sym_zobrist[opponent]
+        for s in captured:
+            cells[s] = opponent
+            self._hash ^= keys[s]
+            self._sym_hash ^= sym_keys[s]
+        for s in captured:
+            for d in self.neighbor_offsets:
+                neighbor = chains[s + d]
+                if neighbor is not None and neighbor.color == player:
+                    neighbor.liberties.discard(s)
+                    touched.add(neighbor)
+        for s in captured:
+            if chains[s] is None:
+                self._build_chain(s)
+
+        # 原先经由p连在一起的己方棋子可能重新分成几块；相邻对方棋串多出一口气
+        for d in self.neighbor_offsets:
+            q = p + d
+            if cells[q] == player:
+                if chains[q] is stale:
+                    self._build_chain(q)
+            elif cells[q] == opponent:
+                chains[q].liberties.add(p)
+                touched.add(chains[q])
+        for chain in touched:
+            self._index_chain(chain)
+
+    def _build_chain(self, start: int) -> _Chain:
+        """从start出发泛洪填充，重新建立其所在的棋串及其气"""
+        cells = self.cells
+        chains = self._chains
+        color = cells[start]
+        chain = _Chain(color)
+        chains[start] = chain
+        stack = [start]
+        while stack:
+            s = stack.pop()
+            chain.stones.append(s)
+            for d in self.neighbor_offsets:
+                q = s + d
+                c = cells[q]
+                if c == EMPTY:
+                    chain.liberties.add(q)
+                elif c == color and chains[q] is not chain:
+                    chains[q] = chain
+                    stack.append(q)
+        self._index_chain(chain)
+        return chain
+
+    def _find_and_capture_stones(self, p: int, opponent: int) -> List[int]:
         """
         查找并移除所有被提吃的棋子
-        返回被提吃的棋子坐标集合
+        返回被提吃的棋子（一维索引）
 
-        关键修复：检查对方棋组是否有气时，必须排除当前落子位置！
+        落子时已从相邻棋串的气中去掉p，气数为0的对方棋串即被提吃
         """
-        all_captured = set()
-        checked_groups = set()  # 使用frozenset跟踪已检查的组，防止重复处理
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        print(f"[CAPTURE DEBUG] 落子位置: ({x},{y}), 对手: {opponent}")
+        all_captured = []
 
-        # 检查四个方向的对方棋子组
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
+        for d in self.neighbor_offsets:
+            chain = self._chains[p + d]
+            # 同一棋串可能与落子点多处相邻，已提吃的位置会变为空点
+            if chain is not None and chain.color == opponent and not chain.liberties:
+                all_captured.extend(chain.stones)
+                self._remove_chain(chain)
 
-            if not (0 <= nx < self.size and 0 <= ny < self.size):
-                continue
-
-            if self.board[ny][nx] != opponent:
-                continue
-
-            # 如果这个位置的棋子已经被标记为提吃，则跳过
-            if (nx, ny) in all_captured:
-                print(f"[CAPTURE DEBUG] 跳过已捕获位置: ({nx},{ny})")
-                continue
-
-            # 获取这个对方棋子所在的组（启用详细调试）
-            opponent_group = self._get_group_at(self.board, nx, ny, opponent, debug=True)
-            print(f"[CAPTURE DEBUG] 发现棋组: {opponent_group}, 大小: {len(opponent_group)}")
-
-            # 使用frozenset作为组的唯一ID，防止重复处理同一组
-            group_id = frozenset(opponent_group)
-            if group_id in checked_groups:
-                print(f"[CAPTURE DEBUG] 棋组已检查过，跳过")
-                continue
-            checked_groups.add(group_id)
-
-            # 关键修复：检查这个组是否有气时，排除当前落子位置(x,y)
-            # 因为我们刚下的棋子占据了那个位置，对方不能利用它作为气
-            has_liberty = self._group_has_liberty_excluding(self.board, opponent_group, opponent, x, y)
-            print(f"[CAPTURE DEBUG] 棋组{'有' if has_liberty else '无'}气")
-
-            if not has_liberty:
-                # 这个组没有气了，全部提吃
-                print(f"[CAPTURE DEBUG] 棋组将被提吃: {opponent_group}")
-                all_captured.update(opponent_group)
+        return all_captured
 
-        print(f"[CAPTURE DEBUG] 总共捕获: {len(all_captured)} 个: {all_captured}")
+    def pass_move(self) -> tuple:
+        """虚着（盘面哈希不变，position_hash随行棋方切换），返回撤销记录"""
+        record = (PASS, self.current_player, (), self.ko_point, self.last_move, self.current_player)
+        self.ko_point = None
+        self._record(PASS, self.current_player, ())
+        self.current_player = 3 - self.current_player
+        return record
 
-        # 从棋盘上移除被提吃的棋子
-        for cx, cy in all_captured:
-            print(f"[CAPTURE DEBUG] 移除棋子: ({cx},{cy})")
-            self.board[cy][cx] = 0
+    def setup_position(self, black: List[Tuple[int, int]], white: List[Tuple[int, int]],
+                       player: int = BLACK):
+        """
+        在开局前摆放初始棋子（让子、死活题），player为之后的行棋方
 
-        # 验证：移除后检查棋盘上是否还有该玩家的棋子
-        remaining_opponent = sum(row.count(opponent) for row in self.board)
-        print(f"[CAPTURE DEBUG] 移除后对手剩余棋子数: {remaining_opponent}")
+        摆放的局面作为第0手的快照保存，复盘和撤销都以它为起点
+        """
+        if self.move_history:
+            raise ValueError("只能在第一手之前摆放棋子")
+        for color, stones in ((BLACK, black), (WHITE, white)):
+            for x, y in stones:
+                p = self.index(x, y)
+                if self.cells[p] == EMPTY:
+                    self._add_stone(p, color)
+        self.current_player = player
+        if self.superko:
+            self._hash_history = {self._hash: 1}
+        history = self.move_history
+        history.start_hash = self._hash
+        history.add_snapshot(self.encode(), self.captured_black, self.captured_white, player)
+
+    def board_at(self, ply: int) -> 'GoBoard':
+        """
+        还原第ply手之后的局面（0为开局），返回新的棋盘，原棋盘不受影响
 
-        return all_captured
+        从不晚于ply的最近快照开始重放，最多重放 SNAPSHOT_INTERVAL - 1 手
+        """
+        history = self.move_history
+        if not 0 <= ply <= len(history):
+            raise IndexError(f"手数超出范围: {ply}")
+
+        base, snapshot = history.nearest_snapshot(ply)
+        board = GoBoard(self.size, self.superko, self.engine)
+        board.komi = self.komi
+        if snapshot is not None:
+            packed, board.captured_black, board.captured_white, board.current_player = snapshot
+            for p, color in zip(self.points, unpack_points(packed, len(self.points))):
+                if color:
+                    board._add_stone(p, color)
+            if base:
+                ko = history.ko[base - 1]
+                last = history.last_point(base)
+                board.ko_point = self.coords(ko) if ko >= 0 else None
+                board.last_move = self.coords(last) if last >= 0 else None
+
+        board.move_history = history.copy(base)
+        if self.superko:
+            hash_history = board._hash_history = {history.start_hash: 1}
+            for i in range(base):
+                if history.points[i] != PASS:
+                    h = history.hashes[i]
+                    hash_history[h] = hash_history.get(h, 0) + 1
+
+        for i in range(base, ply):
+            p = history.points[i]
+            if p == PASS:
+                board.pass_move()
+            else:
+                board._play(p, history.players[i])
+        return board
 
-    def _count_liberties_of_group(self, board: List[List[int]], group: Set[Tuple[int, int]]) -> int:
-        """计算棋子组的气数"""
-        liberties = set()
-        directions = [(0, 1), (0, -1), (1, 0), (-1, 0)]
-
-        for gx, gy in group:
-            for dx, dy in directions:
-                nx, ny = gx + dx, gy + dy
-                if 0 <= nx < self.size and 0 <= ny < self.size:
-                    if board[ny][nx] == 0:
-                        liberties.add((nx, ny))
-
-        return len(liberties)
-
-    def pass_move(self):
-        """虚着"""
-        self.move_history.append({
-            'x': -1,
-            'y': -1,
-            'player': self.current_player,
-            'captured': 0
-        })
-        self.current_player = 3 - self.current_player
-        self.ko_point = None
+    def subscribe(self, event: str, callback: Callable[..., None]):
+        """
+        订阅追踪事件，回调以 callback(board, **info) 调用：
+        place   - x, y, player, captured（提子数）
+        capture - x, y, player, stones（被提棋子坐标列表）
+        ko      - x, y, player, point（新的打劫点）
+        """
+        if event not in TRACE_EVENTS:
+            raise ValueError(f"未知的追踪事件: {event}")
+        if self._tracers is None:
+            self._tracers = {}
+        self._tracers.setdefault(event, []).append(callback)
+
+    def unsubscribe(self, event: str, callback: Callable[..., None]):
+        """取消订阅；全部取消后恢复为无追踪状态"""
+        callbacks = (self._tracers or {}).get(event)
+        if not callbacks or callback not in callbacks:
+            return
+        callbacks.remove(callback)
+        if not callbacks:
+            del self._tracers[event]
+        if not self._tracers:
+            self._tracers = None
+
+    def _trace_play(self, x: int, y: int, player: int, captured: List[int]):
+        """向订阅者分发一手棋产生的事件（只在有订阅者时调用）"""
+        tracers = self._tracers
+        for callback in tracers.get("place", ()):
+            callback(self, x=x, y=y, player=player, captured=len(captured))
+        if captured:
+            stones = [self.coords(s) for s in captured]
+            for callback in tracers.get("capture", ()):
+                callback(self, x=x, y=y, player=player, stones=stones)
+        if self.ko_point is not None:
+            for callback in tracers.get("ko", ()):
+                callback(self, x=x, y=y, player=player, point=self.ko_point)
 
     def get_board_state(self) -> List[List[int]]:
-        """获取棋盘状态"""
-        return [row[:] for row in self.board]
+        """获取棋盘状态（二维列表，供API返回）"""
+        size = self.size
+        rows = []
+        for y in range(size):
+            start = self.index(0, y)
+            rows.append(list(self.cells[start:start + size]))
+        return rows
+
+    def encode(self) -> bytes:
+        """盘面的紧凑编码（见 pack_points），用于快照存储和API传输"""
+        size = self.size
+        cells = self.cells
+        return pack_points(b''.join([cells[p:p + size] for p in self.points[::size]]))
+
+    @staticmethod
+    def decode(data: bytes, size: int, player: int = BLACK, superko: bool = False,
+               engine: str = "list") -> 'GoBoard':
+        """由 encode 的结果还原棋盘（只有盘面，没有历史），player为行棋方"""
+        black, white = [], []
+        for i, color in enumerate(unpack_points(data, size * size)):
+            if color == BLACK:
+                black.append((i % size, i // size))
+            elif color == WHITE:
+                white.append((i % size, i // size))
+        board = GoBoard(size, superko, engine)
+        board.setup_position(black, white, player)
+        return board
 
     def get_valid_moves(self) -> List[Tuple[int, int]]:
         """获取所有合法的落子位置"""
-        valid_moves = []
-        for y in range(self.size):
-            for x in range(self.size):
-                if self.is_valid_move(x, y):
-                    valid_moves.append((x, y))
-        return valid_moves
+        coords = self.tables.coords
+        return [coords[p] for p in self._legal_moves(self.current_player)]
+
+    def legal_mask(self, player: Optional[int] = None) -> bytearray:
+        """
+        整盘合法点掩码：长度 size*size，按行优先顺序，1为合法
+
+        由棋串的气一次算出，不逐点试下。player默认为当前行棋方
+        """
+        if player is None:
+            player = self.current_player
+        ordinals = self.tables.ordinals
+        mask = bytearray(self.size * self.size)
+        for p in self._legal_moves(player):
+            mask[ordinals[p]] = 1
+        return mask
+
+    def legal_bitmask(self, player: Optional[int] = None) -> bytes:
+        """legal_mask 按位打包（每字节8个交叉点，高位在前），便于API传输"""
+        mask = self.legal_mask(player)
+        packed = bytearray((len(mask) + 7) // 8)
+        for i, legal in enumerate(mask):
+            if legal:
+                packed[i >> 3] |= 0x80 >> (i & 7)
+        return bytes(packed)
+
+    def _legal_moves(self, player: int) -> List[int]:
+        """player的全部合法点（一维索引，升序）；打劫和超级劫只对当前行棋方生效"""
+        moves = list(self._legal_points(player))
+        if player != self.current_player:
+            return moves
+        if self.ko_point:
+            ko = self.index(*self.ko_point)
+            moves = [p for p in moves if p != ko]
+        if self.superko:
+            history = self._hash_history
+            moves = [p for p in moves if self._hash_after(p, player) not in history]
+        return moves
+
+    def _legal_points(self, player: int) -> Iterable[int]:
+        """不考虑打劫的合法点（升序）"""
+        return compress(range(len(self.cells)), self._refresh_legal(player))
+
+    def _refresh_legal(self, player: int) -> bytearray:
+        """
+        增量更新player的合法点掩码
+
+        一个空点是否合法只取决于相邻点的状态和相邻棋串的气数。因此只需重算：
+        状态改变过的点、它们的相邻空点、以及与这些点相邻（或包含这些点）的棋串的气
+        """
+        legal = self._legal[player]
+        dirty = self._dirty[player]
+        if not dirty:
+            return legal
+
+        cells = self.cells
+        chains = self._chains
+        recheck = set()
+        for p in dirty:
+            if cells[p] == EMPTY:
+                recheck.add(p)
+            else:
+                legal[p] = 0
+                recheck |= chains[p].liberties
+            for d in self.neighbor_offsets:
+                q = p + d
+                c = cells[q]
+                if c == EMPTY:
+                    recheck.add(q)
+                elif c != BORDER:
+                    recheck |= chains[q].liberties
+        dirty.clear()
+
+        is_legal = self._is_legal
+        for q in recheck:
+            legal[q] = is_legal(q, player)
+        return legal
 
     def is_game_over(self) -> bool:
         """检查游戏是否结束（连续两次虚着）"""
-        if len(self.move_history) >= 2:
-            if (self.move_history[-1]['x'] == -1 and
-                self.move_history[-2]['x'] == -1):
+        points = self.move_history.points
+        if len(points) >= 2:
+            if points[-1] == PASS and points[-2] == PASS:
                 return True
         return False
 
-    def get_score(self) -> Tuple[int, int]:
+    def get_score(self, regions: Optional[dict] = None) -> Tuple[int, int]:
         """
-        计算分数（简化版数地法）
+        计算分数（简化版数地法，先估计并移除死子）
         返回: (黑棋分数, 白棋分数)
-        """
-        black_score = self.captured_black
-        white_score = self.captured_white + 6.5  # 贴目
 
-        for y in range(self.size):
-            for x in range(self.size):
-                if self.board[y][x] == 1:
-                    black_score += 1
-                elif self.board[y][x] == 2:
-                    white_score += 1
-                else:
-                    # 简单的领地判断
-                    territory = self._get_territory_owner(x, y)
-                    if territory == 1:
-                        black_score += 1
-                    elif territory == 2:
-                        white_score += 1
-
-        return black_score, white_score
-
-    def _get_territory_owner(self, x: int, y: int) -> int:
-        """判断空位的归属（使用泛洪填充）"""
-        if self.board[y][x] != 0:
-            return 0
-
-        visited = set()
-        stack = [(x, y)]
-        touches_black = False
-        touches_white = False
-        empty_region = set()
-
-        while stack:
-            cx, cy = stack.pop()
-            if (cx, cy) in visited:
-                continue
-            visited.add((cx, cy))
+        regions 可传入已经算好的 analyze_regions() 结果，避免重复遍历
+        """
+        if regions is None:
+            regions = self.analyze_regions()
+        return regions['black_score'], regions['white_score']
 
-            if not (0 <= cx < self.size and 0 <= cy < self.size):
+    def analyze_regions(self, remove_dead: bool = True) -> dict:
+        """
+        单次遍历标记所有空白区域（连通分量），记录每块区域的大小和所接触的颜色
+
+        只与一方棋子相邻的空白区域属于该方，同时接触双方的为中立。
+        remove_dead 为True时先估计死子（见 life.dead_stones），死子按空点计入对方的区域。返回：
+            owner: 按一维索引的归属（棋子为其颜色，空点为所属方，中立为0）
+            regions: [(区域大小, 接触颜色掩码 1黑/2白/3双方), ...]
+            black_stones / white_stones / black_territory / white_territory / neutral
+            dead: 死子坐标列表；dead_black / dead_white: 双方死子数
+            black_score / white_score: 与 get_score 相同的计分
+        """
+        cells = self.cells
+        dead = []
+        if remove_dead:
+            from .life import dead_stones
+            dead = dead_stones(self)
+        dead_black = sum(1 for p in dead if cells[p] == BLACK)
+        if dead:
+            cells = bytearray(cells)
+            for p in dead:
+                cells[p] = EMPTY
+        offsets = self.neighbor_offsets
+        owner = bytearray(cells)
+        seen = bytearray(len(cells))
+        regions = []
+        territory = [0, 0, 0]  # 中立、黑、白
+
+        for p in self.points:
+            if cells[p] != EMPTY or seen[p]:
                 continue
-
-            cell_value = self.board[cy][cx]
-
-            if cell_value == 1:
-                touches_black = True
-            elif cell_value == 2:
-                touches_white = True
-            else:
-                empty_region.add((cx, cy))
-                for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]:
-                    stack.append((cx + dx, cy + dy))
-
-        if touches_black and not touches_white:
-            return 1
-        elif touches_white and not touches_black:
-            return 2
-        return 0
+            seen[p] = 1
+            region = [p]
+            touches = 0
+            for r in region:  # 边遍历边追加，即广度优先
+                for d in offsets:
+                    q = r + d
+                    c = cells[q]
+                    if c == EMPTY:
+                        if not seen[q]:
+                            seen[q] = 1
+                            region.append(q)
+                    elif c != BORDER:
+                        touches |= c
+            region_owner = touches if touches in (BLACK, WHITE) else EMPTY
+            if region_owner:
+                for r in region:
+                    owner[r] = region_owner
+            territory[region_owner] += len(region)
+            regions.append((len(region), touches))
+
+        black_stones = cells.count(BLACK)
+        white_stones = cells.count(WHITE)
+        return {
+            'owner': owner,
+            'regions': regions,
+            'black_stones': black_stones,
+            'white_stones': white_stones,
+            'black_territory': territory[BLACK],
+            'white_territory': territory[WHITE],
+            'neutral': territory[EMPTY],
+            'dead': [self.coords(p) for p in dead],
+            'dead_black': dead_black,
+            'dead_white': len(dead) - dead_black,
+            'black_score': self.captured_black + black_stones + territory[BLACK],
+            'white_score': self.captured_white + self.komi + white_stones + territory[WHITE],
+        }
+
+
+def print_capture_trace(board: GoBoard, x: int, y: int, player: int, stones: List[Tuple[int, int]]):
+    """调试用的提子订阅者：board.subscribe("capture", print_capture_trace)"""
+    opponent = 3 - player
+    print(f"[CAPTURE DEBUG] 落子位置: ({x},{y}), 对手: {opponent}")
+    print(f"[CAPTURE DEBUG] 总共捕获: {len(stones)} 个: {stones}")
+    print(f"[CAPTURE DEBUG] 移除后对手剩余棋子数: {board.cells.count(opponent)}")
@@ -0,0 +1,88 @@
+"""
+整盘影响力图
+把黑、白棋子各看成一个平面，用二维前缀和（积分图）一次求出每个点周围 (2r+1)x(2r+1) 窗口内的棋子数，
+相邻两个窗口相减即为恰好在切比雪夫距离r处的棋子数。每个半径只需常数次查表，
+不再对每个点逐一扫描7x7窗口；行内累加和逐行相加都在C层完成。
+
+结果按局面缓存，AI的候选点评估和 /analyze 的影响力汇总共用，使用时按点取值即可。
+"""
+
+from itertools import accumulate
+from operator import add, sub
+from typing import Dict, List, Tuple
+
+from .board_tables import MAX_RADIUS
+from .go_board import GoBoard
+
+_CACHE_LIMIT = 256
+
+# 按颜色取出棋子平面的字节映射
+_PLANES = {color: bytes(1 if c == color else 0 for c in range(256)) for color in (1, 2)}
+
+_corners: Dict[Tuple[int, int], tuple] = {}
+_maps: Dict[Tuple[int, int], list] = {}
+
+
+def _window_corners(stride: int, radius: int) -> tuple:
+    """每个一维索引的半径radius窗口在前缀和表中的四个角（越出棋盘的部分截掉）"""
+    key = (stride, radius)
+    corners = _corners.get(key)
+    if corners is None:
+        width = stride + 1
+        last = stride - 1
+        corners = []
+        for row in range(stride):
+            r0, r1 = max(row - radius, 0), min(row + radius, last) + 1
+            for col in range(stride):
+                c0, c1 = max(col - radius, 0), min(col + radius, last) + 1
+                corners.append((r1 * width + c1, r0 * width + c1, r1 * width + c0, r0 * width + c0))
+        corners = _corners[key] = tuple(corners)
+    return corners
+
+
+def _rings(plane: bytes, stride: int) -> List[List[int]]:
+    """一个棋子平面的各圈计数：rings[d][p] 为与p距离恰好为d的棋子数（d = 1..MAX_RADIUS）"""
+    # 前缀和表：table[(r + 1) * (stride + 1) + (c + 1)] 为左上角到 (r, c) 的矩形内棋子数
+    table = [0] * (stride + 1)
+    running = table
+    for start in range(0, stride * stride, stride):
+        row = list(accumulate(plane[start:start + stride], initial=0))
+        running = list(map(add, running, row))
+        table.extend(running)
+
+    rings: List[List[int]] = [None]
+    inner = list(plane)
+    for radius in range(1, MAX_RADIUS + 1):
+        box = [table[a] - table[b] - table[c] + table[d]
+               for a, b, c, d in _window_corners(stride, radius)]
+        rings.append(list(map(sub, box, inner)))
+        inner = box
+    return rings
+
+
+def influence_maps(board: GoBoard) -> list:
+    """
+    整盘的分圈棋子计数：maps[color][d][p]，按一维索引（边框上的值无意义）
+
+    同一局面只计算一次；返回的列表是共享的，调用方不要修改
+    """
+    key = (board.size, board.position_hash)
+    maps = _maps.get(key)
+    if maps is None:
+        cells = board.cells
+        maps = [None] + [_rings(cells.translate(_PLANES[color]), board.stride) for color in (1, 2)]
+        if len(_maps) >= _CACHE_LIMIT:
+            _maps.clear()
+        _maps[key] = maps
+    return maps
+
+
+def influence_totals(board: GoBoard) -> Tuple[float, float]:
+    """双方的总影响力：每个交叉点周围3路以内的棋子按 1/距离 加权求和"""
+    maps = influence_maps(board)
+    points = board.points
+    totals = []
+    for color in (1, 2):
+        rings = maps[color]
+        totals.append(sum(sum(rings[d][p] for p in points) / d for d in range(1, MAX_RADIUS + 1)))
+    return totals[0], totals[1]
@@ -0,0 +1,218 @@
+"""
+征子计算
+只展开征子的强制应对：攻方每次在守方棋串仅有的两口气之一上叫吃，
+守方只能长出或提掉叫吃自己的棋子。逃到三口气即视为征子不成立。
+
+搜索在棋盘快照上用落子/撤销进行，不影响原棋盘；结果按 (局面哈希, 棋串, 先手方) 缓存，
+并限制单次搜索的节点数，超过上限按征不到处理，保证请求耗时有界。
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from .go_board import GoBoard, EMPTY
+
+# 单次征子计算最多展开的节点数（一次落子算一个节点）
+LADDER_NODE_BUDGET = 400
+_CACHE_LIMIT = 1 << 14
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class LadderReader:
+    """带缓存的征子计算器，可被多个棋盘共享"""
+
+    __slots__ = ('budget', '_cache')
+
+    def __init__(self, budget: int = LADDER_NODE_BUDGET):
+        self.budget = budget
+        self._cache: Dict[Tuple[int, int, int, bool], bool] = {}
+
+    def captures(self, board: GoBoard, p: int, attacker_first: bool = True,
+                 in_place: bool = False) -> bool:
+        """
+        索引p处的棋串能否被征吃
+
+        attacker_first为True时攻方先走（守方应有两口气），否则守方先走（守方已被叫吃）。
+        in_place为True时直接在board上落子/撤销（调用方独占的副本），省去快照的复制
+        """
+        stones = board.chain_stones(p)
+        if not stones:
+            return False
+        key = (board.size, board.position_hash, min(stones), attacker_first)
+        result = self._cache.get(key)
+        if result is not None:
+            return result
+
+        probe = board if in_place else board.snapshot()
+        # 攻方先走时可能不是轮到的一方，而undo按落子方恢复行棋方，算完要还原
+        to_move = probe.current_player
+        nodes = [self.budget]
+        try:
+            if attacker_first:
+                result = _attack(probe, p, nodes)
+            else:
+                result = _defend(probe, p, nodes)
+        except _BudgetExceeded:
+            result = False
+        finally:
+            probe.current_player = to_move
+
+        if len(self._cache) >= _CACHE_LIMIT:
+            self._cache.clear()
+        self._cache[key] = result
+        return result
+
+    def captures_after(self, board: GoBoard, x: int, y: int, player: int,
+                       probe: Optional[GoBoard] = None) -> bool:
+        """
+        player在(x, y)落子后，这块棋能否被对方征吃（对方接着走）
+
+        probe为与board局面相同、调用方独占的副本，多次查询可共用，计算后原样恢复
+        """
+        p = board.index(x, y)
+        if _liberties_after(board, p, player) > 2:
+            return False  # 落子后三口气以上，不必展开
+        if not board.is_valid_move(x, y, player=player):
+            return False
+        if probe is None:
+            probe = board.snapshot()
+        to_move = probe.current_player
+        probe._play(p, player)
+        try:
+            if probe.liberty_count(p) == 1:
+                return True  # 自己填成一口气，对方直接提
+            return self.captures(probe, p, attacker_first=True, in_place=True)
+        finally:
+            probe.undo()
+            probe.current_player = to_move
+
+    def clear(self):
+        self._cache.clear()
+
+
+def _liberties_after(board: GoBoard, p: int, player: int, occupied: int = -1) -> int:
+    """
+    不落子估计player在p落子后棋串的气数（occupied为假定已被对方占据的点）；
+    能提子时返回一个大数（提子后气数不定）
+    """
+    cells = board.cells
+    liberties = set()
+    for d in board.neighbor_offsets:
+        q = p + d
+        c = cells[q]
+        if c == EMPTY:
+            liberties.add(q)
+        elif c == player:
+            liberties.update(board.chain_liberties(q))
+        elif c == 3 - player and board.liberty_count(q) == 1:
+            return len(board.points)
+    liberties.discard(p)
+    liberties.discard(occupied)
+    return len(liberties)
+
+
+def _step(nodes: List[int]):
+    nodes[0] -= 1
+    if nodes[0] < 0:
+        raise _BudgetExceeded
+
+
+def _attack(board: GoBoard, p: int, nodes: List[int]) -> bool:
+    """攻方走：能否征吃p处的棋串"""
+    liberties = board.chain_liberties(p)
+    if len(liberties) == 1:
+        return True
+    if len(liberties) > 2:
+        return False
+    defender = board.cells[p]
+    attacker = 3 - defender
+    for q in liberties:
+        # 守方在另一口气上长出就有三口气以上时，这样叫吃征不住，不必展开
+        escape = liberties[1] if q == liberties[0] else liberties[0]
+        if _liberties_after(board, escape, defender, q) > 2:
+            continue
+        if not board.is_valid_move(*board.coords(q), player=attacker):
+            continue
+        _step(nodes)
+        board._play(q, attacker)
+        try:
+            if _defend(board, p, nodes):
+                return True
+        finally:
+            board.undo()
+    return False
+
+
+def _defend(board: GoBoard, p: int, nodes: List[int]) -> bool:
+    """守方走（已被叫吃）：返回True表示无论怎样应对都会被提"""
+    liberties = board.chain_liberties(p)
+    if len(liberties) != 1:
+        return len(liberties) == 0
+    defender = board.cells[p]
+    attacker = 3 - defender
+
+    # 应对：提掉相邻的只剩一口气的攻方棋子，或在最后一口气上长出
+    moves = []
+    seen = set()
+    cells = board.cells
+    for s in board.chain_stones(p):
+        for d in board.neighbor_offsets:
+            q = s + d
+            if cells[q] == attacker and q not in seen:
+                seen.update(board.chain_stones(q))
+                if board.liberty_count(q) == 1:
+                    moves.extend(board.chain_liberties(q))
+    moves.append(liberties[0])
+
+    for q in dict.fromkeys(moves):
+        if not board.is_valid_move(*board.coords(q), player=defender):
+            continue
+        _step(nodes)
+        board._play(q, defender)
+        try:
+            count = board.liberty_count(p)
+            if count >= 3 or (count == 2 and not _attack(board, p, nodes)):
+                return False
+        finally:
+            board.undo()
+    return True
+
+
+# 进程内共享的计算器（AI评估和局面分析共用同一份缓存）
+default_reader = LadderReader()
+
+
+def find_ladders(board: GoBoard) -> List[Dict]:
+    """
+    找出盘上可被征吃的棋串
+
+    被叫吃的棋串按其所属方先走判断能否逃出，两口气的棋串按对方先走判断能否征吃。
+    所有棋串共用一份快照，在上面落子/撤销，每次计算后原样恢复
+    """
+    ladders = []
+    seen = set()
+    probe = None
+    cells = board.cells
+    for p in board.points:
+        color = cells[p]
+        if color == EMPTY or p in seen:
+            continue
+        stones = board.chain_stones(p)
+        seen.update(stones)
+        liberties = board.liberty_count(p)
+        if liberties > 2:
+            continue
+        attacker_first = liberties == 2 or board.current_player != color
+        if liberties == 1 and attacker_first:
+            continue  # 对方直接提子，不需要征
+        if probe is None:
+            probe = board.snapshot()
+        if default_reader.captures(probe, p, attacker_first, in_place=True):
+            ladders.append({
+                'color': color,
+                'stones': [board.coords(s) for s in sorted(stones)],
+                'liberties': liberties,
+            })
+    return ladders
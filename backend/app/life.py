@@ -0,0 +1,146 @@
+"""
+死活判断
+Benson算法求无条件活棋（对方连续落子也无法提吃的棋串）及其围住的区域；
+其余棋串用眼位和包围情况做启发式估计，供终局数子使用。
+
+只读取盘面cells，与棋盘引擎无关；每一步都是对棋串和区域的泛洪标记，线性时间。
+"""
+
+from typing import Dict, List, Set, Tuple
+
+from .go_board import GoBoard, EMPTY, BORDER
+
+# 启发式判死的最大区域（己方棋子 + 可到达的空点），超过这个范围的棋视为还有活动余地
+MAX_DEAD_AREA_RATIO = 4  # 棋盘交叉点数的 1/4
+
+
+def _label(board: GoBoard, inside) -> Tuple[List[int], List[List[int]]]:
+    """把满足 inside(color) 的点按四连通分块，返回 (每点所属块号，-1为不属于) 和各块的点"""
+    cells = board.cells
+    offsets = board.neighbor_offsets
+    label = [-1] * len(cells)
+    blocks = []
+    for p in board.points:
+        if label[p] >= 0 or not inside(cells[p]):
+            continue
+        block = [p]
+        label[p] = len(blocks)
+        for r in block:  # 边遍历边追加，即广度优先
+            for d in offsets:
+                q = r + d
+                if label[q] < 0 and inside(cells[q]):
+                    label[q] = len(blocks)
+                    block.append(q)
+        blocks.append(block)
+    return label, blocks
+
+
+def unconditional_life(board: GoBoard, color: int) -> Tuple[Set[int], Set[int]]:
+    """
+    Benson算法：返回 (无条件活的棋子, 它们围住的区域内的所有点)
+
+    区域指不含color棋子的极大连通块（空点和对方棋子）。若区域中每个空点都是某棋串的气，
+    该区域对这个棋串是"要害"。反复删除要害区域少于两个的棋串、以及与已删除棋串相邻的区域，
+    剩下的棋串无条件活。剩下的区域中，对某个活棋串是要害的（每个空点都与活棋相邻，
+    对方在其中做不出眼）才是无条件的地，其中的对方棋子无条件死；更大的区域里对方仍可能做活
+    """
+    cells = board.cells
+    offsets = board.neighbor_offsets
+    chain_of, chains = _label(board, lambda c: c == color)
+    _, regions = _label(board, lambda c: c != color and c != BORDER)
+
+    # 每个区域相邻的棋串，以及对哪些棋串是要害
+    borders: List[Set[int]] = []
+    vital: List[Set[int]] = []
+    for region in regions:
+        adjacent = set()
+        common = None  # 区域内所有空点共同相邻的棋串
+        for r in region:
+            around = {chain_of[r + d] for d in offsets if cells[r + d] == color}
+            adjacent |= around
+            if cells[r] == EMPTY:
+                common = around if common is None else common & around
+        borders.append(adjacent)
+        vital.append(adjacent if common is None else common)
+
+    alive_chains = set(range(len(chains)))
+    alive_regions = set(range(len(regions)))
+    while True:
+        vital_count: Dict[int, int] = {}
+        for i in alive_regions:
+            for c in vital[i]:
+                vital_count[c] = vital_count.get(c, 0) + 1
+        removed = {c for c in alive_chains if vital_count.get(c, 0) < 2}
+        if not removed:
+            break
+        alive_chains -= removed
+        alive_regions = {i for i in alive_regions if borders[i] <= alive_chains}
+
+    stones = {p for c in alive_chains for p in chains[c]}
+    area = {p for i in alive_regions if vital[i] & alive_chains for p in regions[i]}
+    return stones, area
+
+
+def _small_eye_space(board: GoBoard, points: List[int]) -> bool:
+    """
+    眼位是否小到做不出两个眼：三个点以内，或四个点的方块（方四）。
+    更大的眼位（直四、曲四、板六等）还可能做活，不判死
+    """
+    if len(points) <= 3:
+        return True
+    if len(points) == 4:
+        a = min(points)
+        return set(points) == {a, a + 1, a + board.stride, a + board.stride + 1}
+    return False
+
+
+def dead_stones(board: GoBoard) -> List[int]:
+    """
+    估计盘上的死子（一维索引）
+
+    1. 位于对方无条件活区域内的棋子必死；
+    2. 其余不是无条件活的棋，取它在不经过对方棋子时能到达的范围（己方棋子和空点），
+       若范围内不足两个眼（只与己方棋子相邻的空白区域）、眼位小到做不出两个眼、
+       范围不大、且被更多的对方棋子包围，则判为死子
+    """
+    cells = board.cells
+    offsets = board.neighbor_offsets
+    max_area = len(board.points) // MAX_DEAD_AREA_RATIO
+    life = {color: unconditional_life(board, color) for color in (1, 2)}
+
+    # 眼：只与一方棋子相邻的空白区域，记在与之相邻的棋子上
+    empty_of, empties = _label(board, lambda c: c == EMPTY)
+    eye_owner = []
+    for region in empties:
+        touches = 0
+        for r in region:
+            for d in offsets:
+                c = cells[r + d]
+                if c != EMPTY and c != BORDER:
+                    touches |= c
+        eye_owner.append(touches)
+
+    dead = []
+    for color in (1, 2):
+        opponent = 3 - color
+        alive, _ = life[color]
+        opponent_area = life[opponent][1]
+        _, areas = _label(board, lambda c, o=opponent: c != o and c != BORDER)
+        for area in areas:
+            stones = [p for p in area if cells[p] == color]
+            if not stones:
+                continue
+            if any(p in opponent_area for p in stones):
+                dead.extend(stones)
+                continue
+            if any(p in alive for p in stones) or len(area) > max_area:
+                continue
+            eye_points = [p for p in area if cells[p] == EMPTY and eye_owner[empty_of[p]] == color]
+            eyes = {empty_of[p] for p in eye_points}
+            if len(eyes) >= 2 or not _small_eye_space(board, eye_points):
+                continue
+            surrounding = {p + d for p in area for d in offsets if cells[p + d] == opponent}
+            if len(surrounding) > len(stones):
+                dead.extend(stones)
+    dead.sort()
+    return dead
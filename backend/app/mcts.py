@@ -0,0 +1,591 @@
+"""
+蒙特卡洛树搜索AI（UCT）
+树中每个结点是一手棋，按UCB1公式在胜率和探索之间选择；叶结点之后用轻量的随机对局（playout）
+走到终局并数子判定胜负，结果沿路径回传。最后选择访问次数最多的着手。
+随机对局只在对方上一手被叫吃时提掉它，其余着手均匀随机（不填自己的真眼）。
+
+随机对局不使用 GoBoard（它要维护历史、哈希和合法点缓存），而在 _Playout 上进行：
+一维数组的盘面 + 棋串的循环链表 + 伪气（气的个数、和、平方和，可以O(1)判断是否只剩一口气）。
+
+每步的搜索受时间、模拟次数和树结点数三重限制，先到者为准，保证网页对弈时的响应时间和内存有界。
+Python进程受GIL限制只能用满一个核：workers > 1 时按根并行，常驻的工作进程各自建树，
+统计按根结点的着手合并。
+"""
+
+import math
+import os
+import random
+import threading
+import time
+from array import array
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+
+from .go_board import GoBoard, EMPTY, BORDER, BLACK, WHITE, PASS
+from .go_ai import GoAI
+from .influence import influence_maps
+
+# 每步的搜索预算，先到者为准
+#   time_limit：秒
+#   playouts：随机对局次数
+#   max_nodes：树的结点数上限（内存上界，每个结点连同候选点不超过约1KB），达到后只模拟不再扩展
+#   workers：参与搜索的进程数（含本进程），大于1时根并行，部署时用环境变量 MCTS_WORKERS 设置
+MCTS_BUDGET = {"time_limit": 2.0, "playouts": 5000, "max_nodes": 20000,
+               "workers": int(os.environ.get("MCTS_WORKERS", 1))}
+
+# UCB1的探索系数
+UCT_EXPLORATION = 1.0
+
+# 根结点只考虑离已有棋子这么多路以内的点和开局点（小棋盘上几乎不起作用，
+# 19路上让有限的模拟次数集中在有意义的着手上）
+ROOT_RADIUS = 2
+
+# 随机对局的手数上限（按交叉点数的倍数），防止反复打劫走不完
+_PLAYOUT_LENGTH = 3
+
+# 并行搜索时等待工作进程回传结果的额外时间（秒）
+_RESULT_GRACE = 0.2
+
+
+class _Playout:
+    """
+    随机对局用的轻量棋盘：只支持落子（含提子和单劫），没有撤销和历史
+
+    head[p] 为棋子所在棋串的代表点，nxt 把同一棋串的棋子串成循环链表；
+    代表点上记录伪气：每个"棋子-相邻空点"对计一次，libs/lib_sum/lib_sq 分别为个数、
+    索引和、索引平方和。个数为0即无气；个数 * 平方和 == 和 * 和 时所有伪气是同一个点，即被叫吃
+    """
+
+    __slots__ = ('cells', 'head', 'nxt', 'libs', 'lib_sum', 'lib_sq', 'empty', 'slot',
+                 'offsets', 'diagonals', 'ko', 'last', 'player', 'passes', 'captured')
+
+    @classmethod
+    def from_board(cls, board: GoBoard) -> '_Playout':
+        """由GoBoard的当前局面建立"""
+        game = object.__new__(cls)
+        n = len(board.cells)
+        stride = board.stride
+        game.cells = bytearray(board.cells)
+        game.head = list(range(n))
+        game.nxt = list(range(n))
+        game.libs = [0] * n
+        game.lib_sum = [0] * n
+        game.lib_sq = [0] * n
+        game.empty = []
+        game.slot = [-1] * n
+        game.offsets = board.neighbor_offsets
+        game.diagonals = (stride + 1, stride - 1, 1 - stride, -stride - 1)
+        game.ko = board.index(*board.ko_point) if board.ko_point else -1
+        game.last = board.index(*board.last_move) if board.last_move else -1
+        game.player = board.current_player
+        points = board.move_history.points
+        game.passes = 1 if len(points) and points[-1] == PASS else 0
+        game.captured = [0, board.captured_black, board.captured_white]
+
+        cells = game.cells
+        for p in board.points:
+            if cells[p] == EMPTY:
+                game.slot[p] = len(game.empty)
+                game.empty.append(p)
+            elif game.head[p] == p:
+                # 按GoBoard的棋串重建链表和伪气
+                stones = board.chain_stones(p)
+                for a, b in zip(stones, stones[1:] + stones[:1]):
+                    game.head[a] = p
+                    game.nxt[a] = b
+                for s in stones:
+                    for d in game.offsets:
+                        if cells[s + d] == EMPTY:
+                            game._add_liberty(p, s + d)
+        return game
+
+    def pack(self, board: GoBoard) -> tuple:
+        """
+        传给工作进程的紧凑状态：盘面的打包编码（见 GoBoard.encode）加上行棋方、劫、提子数等，
+        board为建立本对象时的局面
+        """
+        return (board.encode(), board.size, self.player, self.ko, self.last, self.passes,
+                tuple(self.captured))
+
+    @classmethod
+    def unpack(cls, state: tuple) -> '_Playout':
+        """由 pack 的结果重建"""
+        data, size, player, ko, last, passes, captured = state
+        game = cls.from_board(GoBoard.decode(data, size, player))
+        game.ko, game.last, game.passes, game.captured = ko, last, passes, list(captured)
+        return game
+
+    def copy(self) -> '_Playout':
+        other = object.__new__(_Playout)
+        other.cells = bytearray(self.cells)
+        other.head = self.head[:]
+        other.nxt = self.nxt[:]
+        other.libs = self.libs[:]
+        other.lib_sum = self.lib_sum[:]
+        other.lib_sq = self.lib_sq[:]
+        other.empty = self.empty[:]
+        other.slot = self.slot[:]
+        other.offsets = self.offsets
+        other.diagonals = self.diagonals
+        other.ko = self.ko
+        other.last = self.last
+        other.player = self.player
+        other.passes = self.passes
+        other.captured = self.captured[:]
+        return other
+
+    def _add_liberty(self, h: int, q: int):
+        self.libs[h] += 1
+        self.lib_sum[h] += q
+        self.lib_sq[h] += q * q
+
+    def _in_atari(self, h: int) -> bool:
+        """代表点为h的棋串是否只剩一口气"""
+        n = self.libs[h]
+        return n > 0 and n * self.lib_sq[h] == self.lib_sum[h] * self.lib_sum[h]
+
+    def is_legal(self, p: int, player: int) -> bool:
+        """p为空点时，player在p落子是否合法（不是禁着点，也不是劫）"""
+        if p == self.ko:
+            return False
+        cells = self.cells
+        offsets = self.offsets
+        for d in offsets:
+            if cells[p + d] == EMPTY:
+                return True
+        head, libs, lib_sum, lib_sq = self.head, self.libs, self.lib_sum, self.lib_sq
+        for d in offsets:
+            q = p + d
+            c = cells[q]
+            if c == BORDER:
+                continue
+            h = head[q]
+            atari = libs[h] * lib_sq[h] == lib_sum[h] * lib_sum[h]  # 相邻棋串至少有p这口气
+            if (c == player) != atari:
+                # 己方棋串除p之外还有气，或对方棋串的最后一口气就是p
+                return True
+        return False
+
+    def is_eye(self, p: int, player: int) -> bool:
+        """p是否为player的真眼（四周都是己方棋子，对角的对方棋子不足以破眼）"""
+        cells = self.cells
+        for d in self.offsets:
+            c = cells[p + d]
+            if c != player and c != BORDER:
+                return False
+        opponent = 3 - player
+        bad = 0
+        edge = False
+        for d in self.diagonals:
+            c = cells[p + d]
+            if c == opponent:
+                bad += 1
+            elif c == BORDER:
+                edge = True
+        return bad < (1 if edge else 2)
+
+    def play(self, p: int):
+        """当前行棋方在p落子（调用方已检查合法性），PASS为虚着"""
+        player = self.player
+        self.player = 3 - player
+        if p == PASS:
+            self.passes += 1
+            self.ko = self.last = -1
+            return
+        self.passes = 0
+        self.last = p
+        cells = self.cells
+        head = self.head
+        nxt = self.nxt
+        libs, lib_sum, lib_sq = self.libs, self.lib_sum, self.lib_sq
+
+        cells[p] = player
+        self._take_empty(p)
+        head[p] = nxt[p] = p
+        count = total = square = 0
+        for d in self.offsets:
+            q = p + d
+            c = cells[q]
+            if c == EMPTY:
+                count += 1
+                total += q
+                square += q * q
+            elif c != BORDER:
+                h = head[q]
+                libs[h] -= 1
+                lib_sum[h] -= p
+                lib_sq[h] -= p * p
+        libs[p], lib_sum[p], lib_sq[p] = count, total, square
+
+        # 与相邻的己方棋串合并：新子先并入第一个棋串，之后把其他棋串并进来
+        h = p
+        for d in self.offsets:
+            q = p + d
+            if cells[q] == player and head[q] != h:
+                if h == p:
+                    self._merge(head[q], p)
+                    h = head[q]
+                else:
+                    self._merge(h, head[q])
+
+        # 提掉没有气的对方棋串
+        opponent = 3 - player
+        captured = 0
+        last = -1
+        for d in self.offsets:
+            q = p + d
+            if cells[q] == opponent and libs[head[q]] == 0:
+                last = q
+                captured += self._remove(head[q])
+        self.captured[player] += captured
+
+        # 与 GoBoard._play 相同：只提一子且自己这组棋也只有一口气时形成劫
+        self.ko = last if captured == 1 and self._in_atari(head[p]) else -1
+
+    def _merge(self, h: int, other: int):
+        """把代表点为other的棋串并入h"""
+        head = self.head
+        nxt = self.nxt
+        s = other
+        while True:
+            head[s] = h
+            s = nxt[s]
+            if s == other:
+                break
+        nxt[h], nxt[other] = nxt[other], nxt[h]
+        self.libs[h] += self.libs[other]
+        self.lib_sum[h] += self.lib_sum[other]
+        self.lib_sq[h] += self.lib_sq[other]
+
+    def _remove(self, h: int) -> int:
+        """移除棋串，相邻棋串各自增加伪气，返回提子数"""
+        cells = self.cells
+        nxt = self.nxt
+        stones = [h]
+        s = nxt[h]
+        while s != h:
+            stones.append(s)
+            s = nxt[s]
+        for s in stones:
+            cells[s] = EMPTY
+            self.slot[s] = len(self.empty)
+            self.empty.append(s)
+        head = self.head
+        for s in stones:
+            for d in self.offsets:
+                c = cells[s + d]
+                if c == BLACK or c == WHITE:
+                    self._add_liberty(head[s + d], s)
+        return len(stones)
+
+    def _take_empty(self, p: int):
+        """把p移出空点列表（与末尾交换）"""
+        empty = self.empty
+        slot = self.slot
+        i = slot[p]
+        last = empty.pop()
+        if last != p:
+            empty[i] = last
+            slot[last] = i
+        slot[p] = -1
+
+    def candidates(self) -> List[int]:
+        """当前行棋方所有合法且不填自己真眼的点"""
+        player = self.player
+        return [p for p in self.empty if self.is_legal(p, player) and not self.is_eye(p, player)]
+
+    def random_move(self, rng: random.Random) -> int:
+        """
+        对方上一手的棋串被叫吃时先提掉它；否则从随机位置开始顺序查找
+        第一个合法且不填眼的点，没有时返回PASS
+        """
+        empty = self.empty
+        n = len(empty)
+        if not n:
+            return PASS
+        player = self.player
+        last = self.last
+        if last >= 0 and self.cells[last] == 3 - player:
+            h = self.head[last]
+            if self._in_atari(h):
+                p = self.lib_sum[h] // self.libs[h]
+                if self.is_legal(p, player):
+                    return p
+        start = int(rng.random() * n)
+        for i in range(start, start + n):
+            p = empty[i % n]
+            if self.is_legal(p, player) and not self.is_eye(p, player):
+                return p
+        return PASS
+
+    def run(self, rng: random.Random, limit: int, komi: float) -> int:
+        """随机走到双方连续虚着（或达到手数上限），返回胜方"""
+        for _ in range(limit):
+            if self.passes >= 2:
+                break
+            self.play(self.random_move(rng))
+        return self.winner(komi)
+
+    def winner(self, komi: float) -> int:
+        """
+        与 GoBoard.get_score 相同的计分：提子 + 棋子 + 只与一方相邻的空点。
+        随机对局走到底时空点基本都是单点眼，只看四周即可
+        """
+        cells = self.cells
+        score = [0, 0, 0]
+        for p in self.empty:
+            touches = 0
+            for d in self.offsets:
+                c = cells[p + d]
+                if c != BORDER:
+                    touches |= c
+            if touches == BLACK or touches == WHITE:
+                score[touches] += 1
+        black = score[BLACK] + cells.count(BLACK) + self.captured[BLACK]
+        white = score[WHITE] + cells.count(WHITE) + self.captured[WHITE] + komi
+        return BLACK if black > white else WHITE
+
+
+class _Node:
+    """搜索树结点：move是player刚走的一手，wins从player的角度统计"""
+
+    __slots__ = ('move', 'player', 'children', 'untried', 'visits', 'wins')
+
+    def __init__(self, move: int, player: int):
+        self.move = move
+        self.player = player
+        self.children: List['_Node'] = []
+        self.untried: Optional[array] = None  # 第一次扩展时才生成，2字节一个点
+        self.visits = 0
+        self.wins = 0
+
+
+def _select(node: _Node) -> _Node:
+    """按UCB1选择子结点"""
+    scale = UCT_EXPLORATION * math.sqrt(math.log(node.visits))
+    best = None
+    best_value = -1.0
+    for child in node.children:
+        value = child.wins / child.visits + scale / math.sqrt(child.visits)
+        if value > best_value:
+            best, best_value = child, value
+    return best
+
+
+def _search(root_state: _Playout, moves: List[int], end_winner: Optional[int], deadline: float,
+            playouts: int, max_nodes: int, rng: random.Random, komi: float) -> Tuple[Dict[int, List[int]], int, int]:
+    """
+    从root_state出发，在预算内反复执行 选择-扩展-模拟-回传，根结点的着手限定为moves；
+    end_winner为根结点虚着即终局（对方刚虚着）时按当前盘面判定的胜方，否则为None
+
+    返回 (根结点各着手的 [访问次数, 胜局数], 模拟次数, 结点数)
+    """
+    root = _Node(PASS, 3 - root_state.player)
+    root.untried = array('h', moves)
+    rng.shuffle(root.untried)
+    clock = time.perf_counter
+    limit = _PLAYOUT_LENGTH * (len(root_state.cells) - root_state.cells.count(BORDER))
+    nodes = 1
+    done = 0
+    # 至少模拟一次，保证根结点有子结点可选
+    while not done or (done < playouts and clock() < deadline):
+        game = root_state.copy()
+        node = root
+        path = [root]
+        # 选择：沿UCB1最大的子结点下行，直到还有未扩展着手的结点
+        while not node.untried and node.children:
+            node = _select(node)
+            game.play(node.move)
+            path.append(node)
+
+        # 扩展：第一次到达的结点先生成候选点（双方连续虚着的终局结点没有）
+        if node.untried is None:
+            node.untried = array('h', game.candidates() if game.passes < 2 else ())
+            rng.shuffle(node.untried)
+        if node.untried and nodes < max_nodes:
+            move = node.untried.pop()
+            child = _Node(move, game.player)
+            node.children.append(child)
+            nodes += 1
+            game.play(move)
+            node = child
+            path.append(node)
+
+        # 模拟：终局结点直接数子；只有根结点的虚着（对方刚虚着）才是当前盘面的终局，用end_winner
+        if game.passes >= 2:
+            if end_winner is not None and len(path) == 2 and node.move == PASS:
+                winner = end_winner
+            else:
+                winner = game.winner(komi)
+        else:
+            winner = game.run(rng, limit, komi)
+        done += 1
+
+        # 回传
+        for visited in path:
+            visited.visits += 1
+            if visited.player == winner:
+                visited.wins += 1
+    return {child.move: [child.visits, child.wins] for child in root.children}, done, nodes
+
+
+def _search_packed(state: tuple, moves: List[int], end_winner: Optional[int], wall_deadline: float,
+                   playouts: int, max_nodes: int, seed: int, komi: float) -> Tuple[Dict[int, List[int]], int, int]:
+    """
+    工作进程的入口：由 _Playout.pack 的结果重建局面后搜索到wall_deadline（time.time() 的绝对时间）为止。
+    在进程池中排队过久、开始时已经过了截止时间的任务直接返回空结果
+    """
+    remaining = wall_deadline - time.time()
+    if remaining <= 0:
+        return {}, 0, 0
+    deadline = time.perf_counter() + remaining
+    return _search(_Playout.unpack(state), moves, end_winner, deadline, playouts, max_nodes,
+                   random.Random(seed), komi)
+
+
+# 进程内所有对局共用的工作进程池，第一次并行搜索时按当时的进程数创建，之后不再调整大小
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()  # 多个请求线程同时第一次使用时只创建一个
+
+
+def _executor(processes: int) -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=processes)
+        return _pool
+
+
+def _discard_executor():
+    """工作进程异常退出（进程池损坏）后丢弃进程池，下次使用时重建"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+class MCTSAI(GoAI):
+    """
+    蒙特卡洛树搜索AI，预算见 MCTS_BUDGET，可按实例覆盖
+
+    workers > 1 时按根并行搜索：本进程和 workers - 1 个工作进程各自独立建树，
+    局面以打包编码传给工作进程，最后按根结点的着手合并访问次数和胜局数。
+    工作进程池所有对局共用，大小在第一次并行搜索时确定
+    """
+
+    __slots__ = ('time_limit', 'playouts', 'max_nodes', 'workers', 'rng')
+
+    def __init__(self, board: GoBoard, player: int, difficulty: str = "mcts", **budget):
+        super().__init__(board, player, difficulty)
+        budget = {**MCTS_BUDGET, **budget}
+        self.time_limit = budget['time_limit']
+        self.playouts = budget['playouts']
+        self.max_nodes = budget['max_nodes']
+        self.workers = max(1, budget['workers'])
+        self.rng = random.Random()
+
+    def get_move(self) -> Tuple[int, int, str]:
+        """在预算内搜索，返回访问次数最多的着手；统计写入 last_stats"""
+        board = self.board
+        start = time.perf_counter()
+        root_state = _Playout.from_board(board)
+        # 根结点用GoBoard的合法点（含超级劫判断），不填自己的真眼；虚着也作为一个选项
+        legal = [p for p in board._legal_moves(self.player) if not root_state.is_eye(p, self.player)]
+        moves = self._root_moves(legal)
+        self.last_stats = {'legal': len(legal), 'evaluated': 0, 'playouts': 0, 'nodes': 1}
+        if not moves:
+            return -1, -1, "没有可以下的地方了，选择虚着"
+        moves.append(PASS)
+
+        # 对方刚虚着时我方虚着即终局，胜负直接按盘面（含死子判断）计算
+        end_winner = None
+        if root_state.passes:
+            black, white = board.get_score()
+            end_winner = BLACK if black > white else WHITE
+
+        if self.workers > 1:
+            totals, playouts, nodes, workers = self._parallel_search(root_state, moves, end_winner, start)
+        else:
+            totals, playouts, nodes = _search(root_state, moves, end_winner, start + self.time_limit,
+                                              self.playouts, self.max_nodes, self.rng, board.komi)
+            workers = 1
+
+        move = max(totals, key=lambda m: totals[m][0])
+        visits, wins = totals[move]
+        elapsed = time.perf_counter() - start
+        rate = wins / visits
+        self.last_stats.update({
+            'evaluated': len(totals),
+            'playouts': playouts,
+            'nodes': nodes,
+            'workers': workers,
+            'elapsed': round(elapsed, 3),
+            'playouts_per_sec': round(playouts / elapsed) if elapsed > 0 else 0,
+            'win_rate': round(rate, 3),
+        })
+        if move == PASS:
+            return -1, -1, f"模拟{playouts}局后判断继续落子没有收益，选择虚着（预计胜率{rate:.0%}）"
+        x, y = board.coords(move)
+        return x, y, f"选择 ({x+1},{y+1})：模拟{playouts}局，这步的胜率最高（约{rate:.0%}）"
+
+    def _root_moves(self, moves: List[int]) -> List[int]:
+        """根结点的候选点：靠近已有棋子或是开局点的合法点，都没有时不筛选"""
+        board = self.board
+        maps = influence_maps(board)
+        book = board.tables.star_points | board.tables.opening_points
+        near = [p for p in moves
+                if p in book or any(maps[color][d][p] for color in (BLACK, WHITE)
+                                    for d in range(1, ROOT_RADIUS + 1))]
+        return near or moves
+
+    def _parallel_search(self, root_state: _Playout, moves: List[int], end_winner: Optional[int],
+                         start: float) -> Tuple[Dict[int, List[int]], int, int, int]:
+        """
+        根并行：模拟次数和结点数上限按进程平分，各进程到同一个绝对截止时间为止；
+        没能按时返回的任务取消或忽略，只用已经拿到的统计。只有进程池损坏时才丢弃重建
+
+        返回 (合并后根结点各着手的 [访问次数, 胜局数], 模拟次数, 结点数, 实际参与的进程数)
+        """
+        workers = self.workers
+        playouts = -(-self.playouts // workers)
+        max_nodes = max(2, self.max_nodes // workers)
+        deadline = start + self.time_limit
+        komi = self.board.komi
+
+        futures = []
+        try:
+            executor = _executor(workers - 1)
+            state = root_state.pack(self.board)
+            wall_deadline = time.time() + (deadline - time.perf_counter())
+            for _ in range(workers - 1):
+                futures.append(executor.submit(_search_packed, state, moves, end_winner, wall_deadline,
+                                               playouts, max_nodes, self.rng.getrandbits(64), komi))
+        except BrokenExecutor:
+            _discard_executor()
+        except (OSError, RuntimeError):
+            pass  # 无法创建工作进程（或解释器正在退出）时只用本进程的结果
+
+        totals, done, nodes = _search(root_state, moves, end_winner, deadline, playouts, max_nodes,
+                                      self.rng, komi)
+        used = 1
+        # 给结果回传留一点余量，工作进程卡住或任务还在排队时也不会让这一步无限等待
+        finished, late = wait(futures, timeout=max(0.0, deadline - time.perf_counter()) + _RESULT_GRACE)
+        for future in late:
+            future.cancel()
+        for future in finished:
+            try:
+                stats, more, more_nodes = future.result()
+            except BrokenExecutor:
+                _discard_executor()
+                continue
+            if not more:
+                continue
+            for move, (visits, wins) in stats.items():
+                merged = totals.setdefault(move, [0, 0])
+                merged[0] += visits
+                merged[1] += wins
+            done += more
+            nodes += more_nodes
+            used += 1
+        return totals, done, nodes, used
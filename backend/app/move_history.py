@@ -0,0 +1,135 @@
+"""
+紧凑的落子历史
+每一手只占几个定长数组元素，不再为每手创建一个字典；撤销所需的信息（提子、打劫点）
+也都保存在这里。每隔 SNAPSHOT_INTERVAL 手保存一次盘面快照，还原任意一手的局面
+最多只需重放 SNAPSHOT_INTERVAL - 1 手（见 GoBoard.board_at）。
+
+落子位置使用GoBoard带哨兵边框的一维索引，-1 表示虚着（同 go_board.PASS）。
+"""
+
+from array import array
+from typing import Dict, Iterator, Optional, Tuple
+
+# 每隔多少手保存一次盘面快照
+SNAPSHOT_INTERVAL = 32
+
+
+class MoveHistory:
+    """
+    按列存储的落子历史
+
+    下标访问返回与旧版相同的字典 {'x', 'y', 'player', 'captured'}，
+    虚着的 x、y 为 -1，按需生成，不常驻内存
+    """
+
+    __slots__ = ('stride', 'start_hash', 'points', 'players', 'ko', 'hashes',
+                 '_capture_end', '_captured', '_snapshots')
+
+    def __init__(self, stride: int):
+        self.stride = stride
+        self.start_hash = 0             # 第一手之前的盘面哈希（摆放了初始棋子时不为0）
+        self.points = array('h')        # 落子的一维索引，虚着为-1
+        self.players = array('b')       # 行棋方
+        self.ko = array('h')            # 这一手之后的打劫点（一维索引），没有为-1
+        self.hashes = array('Q')        # 这一手之后的盘面哈希
+        self._capture_end = array('I')  # 这一手的提子在 _captured 中的结束位置
+        self._captured = array('h')     # 所有被提的棋子，按手数顺序首尾相接
+        # 手数 -> (2位打包的盘面, 黑方提子数, 白方提子数, 行棋方)，记录第n手之后的局面
+        self._snapshots: Dict[int, Tuple[bytes, int, int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self.points)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("落子历史下标越界")
+        p = self.points[i]
+        if p < 0:
+            x = y = -1
+        else:
+            row, col = divmod(p, self.stride)
+            x, y = col - 1, row - 1
+        return {
+            'x': x,
+            'y': y,
+            'player': self.players[i],
+            'captured': self._capture_end[i] - self._capture_start(i)
+        }
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self.points)):
+            yield self[i]
+
+    def _capture_start(self, i: int) -> int:
+        return self._capture_end[i - 1] if i else 0
+
+    def append(self, p: int, player: int, captured, ko: int, board_hash: int):
+        """追加一手（虚着p为-1，没有打劫点ko为-1）"""
+        self.points.append(p)
+        self.players.append(player)
+        self.ko.append(ko)
+        self.hashes.append(board_hash)
+        self._captured.extend(captured)
+        self._capture_end.append(len(self._captured))
+
+    def captured(self, i: int) -> Tuple[int, ...]:
+        """第i手（从0开始）提掉的棋子"""
+        if i < 0:
+            i += len(self.points)
+        return tuple(self._captured[self._capture_start(i):self._capture_end[i]])
+
+    def pop(self) -> Tuple[int, int, Tuple[int, ...]]:
+        """移除最后一手，返回 (落子索引, 行棋方, 被提的棋子)"""
+        n = len(self.points)
+        captured = self.captured(n - 1)
+        self._snapshots.pop(n, None)
+        del self._captured[self._capture_start(n - 1):]
+        p = self.points.pop()
+        player = self.players.pop()
+        self.ko.pop()
+        self.hashes.pop()
+        self._capture_end.pop()
+        return p, player, captured
+
+    def last_point(self, end: Optional[int] = None) -> int:
+        """前end手中最后一个非虚着的落子索引，没有为-1"""
+        points = self.points
+        i = len(points) if end is None else end
+        while i > 0:
+            i -= 1
+            if points[i] >= 0:
+                return points[i]
+        return -1
+
+    def add_snapshot(self, packed: bytes, captured_black: int, captured_white: int, player: int):
+        """保存当前局面（调用方每 SNAPSHOT_INTERVAL 手调用一次，第0手即摆放的初始局面）"""
+        self._snapshots[len(self.points)] = (packed, captured_black, captured_white, player)
+
+    def nearest_snapshot(self, ply: int) -> Tuple[int, Optional[Tuple[bytes, int, int, int]]]:
+        """不晚于第ply手的最近快照，返回 (快照手数, 快照)；空白开局为 (0, None)"""
+        base = ply - ply % SNAPSHOT_INTERVAL
+        while base >= 0:
+            snapshot = self._snapshots.get(base)
+            if snapshot is not None:
+                return base, snapshot
+            base -= SNAPSHOT_INTERVAL
+        return 0, None
+
+    def copy(self, end: Optional[int] = None) -> 'MoveHistory':
+        """复制前end手（默认全部）"""
+        n = len(self.points) if end is None else end
+        other = MoveHistory(self.stride)
+        other.start_hash = self.start_hash
+        other.points = self.points[:n]
+        other.players = self.players[:n]
+        other.ko = self.ko[:n]
+        other.hashes = self.hashes[:n]
+        other._capture_end = self._capture_end[:n]
+        other._captured = self._captured[:self._capture_end[n - 1] if n else 0]
+        other._snapshots = {k: v for k, v in self._snapshots.items() if k <= n}
+        return other
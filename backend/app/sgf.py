@@ -0,0 +1,227 @@
+"""
+SGF棋谱导入导出
+写出：把GoBoard的落子历史（含虚着、贴目、结果）序列化为SGF，提子由复盘自然得出。
+读取：按块读取文件流，逐局解析合集中的每一盘，只保留当前这一盘的数据，
+只跟随主分支（每个节点的第一个变化），可以直接重放成GoBoard。
+
+坐标与GoBoard一致：x为列、y为行，y=0在最上方，对应SGF的 'a'。
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .go_board import GoBoard, BLACK, WHITE, PASS, KOMI, unpack_points
+
+Point = Optional[Tuple[int, int]]  # None 表示虚着
+
+_COLORS = {'B': BLACK, 'W': WHITE}
+_CHUNK_SIZE = 1 << 16
+# 导入时接受的棋盘大小，超出范围的SZ直接拒绝（避免按超大棋盘分配内存）
+MIN_SIZE, MAX_SIZE = 2, 25
+
+
+def _encode_point(x: int, y: int) -> str:
+    return chr(ord('a') + x) + chr(ord('a') + y)
+
+
+def _decode_point(value: str, size: int) -> Point:
+    """SGF坐标转换为(x, y)；空值以及19路以内的 'tt' 表示虚着"""
+    if not value or (value == 'tt' and size <= 19):
+        return None
+    if len(value) != 2:
+        raise ValueError(f"SGF坐标格式错误: {value}")
+    x, y = ord(value[0]) - ord('a'), ord(value[1]) - ord('a')
+    if not (0 <= x < size and 0 <= y < size):
+        raise ValueError(f"SGF坐标超出棋盘: {value}")
+    return x, y
+
+
+def _escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace(']', '\\]')
+
+
+def format_result(black_score: float, white_score: float) -> str:
+    """按SGF的RE格式表示胜负，如 B+3.5、W+0.5"""
+    if black_score == white_score:
+        return '0'
+    if black_score > white_score:
+        return f"B+{black_score - white_score:g}"
+    return f"W+{white_score - black_score:g}"
+
+
+def dump_sgf(board: GoBoard, result: Optional[str] = None, **properties: str) -> str:
+    """
+    把棋盘的落子历史写成一盘SGF
+
+    result为RE属性（如 format_result 的返回值），其余根节点属性（PB、PW、DT等）按关键字传入
+    """
+    root = {
+        'FF': '4',
+        'GM': '1',
+        'CA': 'UTF-8',
+        'SZ': str(board.size),
+        'KM': f"{board.komi:g}",
+        'RU': 'Chinese',
+    }
+    if result is not None:
+        root['RE'] = result
+    root.update(properties)
+
+    parts = ['(;']
+    parts.extend(f"{key}[{_escape(str(value))}]" for key, value in root.items())
+
+    # 摆放的初始棋子（第0手的快照）
+    history = board.move_history
+    _, snapshot = history.nearest_snapshot(0)
+    if snapshot is not None:
+        packed, _, _, player = snapshot
+        colors = unpack_points(packed, len(board.points))
+        for color, key in ((BLACK, 'AB'), (WHITE, 'AW')):
+            stones = [board.coords(p) for p, c in zip(board.points, colors) if c == color]
+            if stones:
+                parts.append(key + ''.join(f"[{_encode_point(x, y)}]" for x, y in stones))
+        parts.append(f"PL[{'B' if player == BLACK else 'W'}]")
+
+    for p, player in zip(history.points, history.players):
+        color = 'B' if player == BLACK else 'W'
+        parts.append(f"\n;{color}[{'' if p == PASS else _encode_point(*board.coords(p))}]")
+    parts.append(')\n')
+    return ''.join(parts)
+
+
+def write_games(games: Iterable[Tuple[GoBoard, Optional[str]]], stream: TextIO) -> int:
+    """把 (棋盘, 结果) 逐盘写入同一个SGF合集文件，返回写出的盘数"""
+    count = 0
+    for board, result in games:
+        stream.write(dump_sgf(board, result))
+        count += 1
+    return count
+
+
+def iter_games(stream: TextIO, chunk_size: int = _CHUNK_SIZE) -> Iterator[Dict]:
+    """
+    逐盘解析SGF合集（流式读取，不把整个文件读入内存）
+
+    每盘返回 {'properties': 根节点属性, 'moves': [(颜色, SGF坐标)]}，
+    属性值为字符串列表，坐标尚未解码（由 replay 按棋盘大小解码，空串为虚着）
+    """
+    depth = 0
+    finished = False   # 主分支已经结束，跳过其余变化直到这盘棋结束
+    nodes: List[Dict[str, List[str]]] = []
+    node: Optional[Dict[str, List[str]]] = None
+    ident = pending = ''  # 当前属性名；上一个属性值之后读到的大写字母
+    value: List[str] = []
+    in_value = escaped = False
+
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        for ch in chunk:
+            if in_value:
+                if escaped:
+                    escaped = False
+                    if ch != '\n':  # 反斜杠加换行为软换行
+                        value.append(ch)
+                elif ch == '\\':
+                    escaped = True
+                elif ch == ']':
+                    in_value = False
+                    if node is not None:
+                        node.setdefault(ident, []).append(''.join(value))
+                else:
+                    value.append(ch)
+            elif ch == '[':
+                # 同一属性的多个值（AB[aa][bb]）之间没有属性名
+                if pending:
+                    ident, pending = pending, ''
+                in_value = True
+                value = []
+            elif 'A' <= ch <= 'Z':
+                pending += ch
+            elif ch == '(':
+                depth += 1
+            elif ch == ')':
+                depth -= 1
+                finished = depth > 0
+                node = None
+                if depth == 0 and nodes:
+                    yield _game_from_nodes(nodes)
+                    nodes = []
+                    finished = False
+            elif ch == ';':
+                pending = ''
+                if depth > 0 and not finished:
+                    node = {}
+                    nodes.append(node)
+
+    if depth != 0:
+        raise ValueError("SGF文件不完整：括号不匹配")
+
+
+def _game_from_nodes(nodes: List[Dict[str, List[str]]]) -> Dict:
+    """把主分支的节点整理为根节点属性和着手序列"""
+    moves = []
+    for node in nodes[1:]:
+        for key in ('B', 'W'):
+            if key in node:
+                moves.append((_COLORS[key], node[key][0]))
+    # 根节点上的着手也算（少数软件把第一手写在根节点）
+    root = nodes[0]
+    for key in ('B', 'W'):
+        if key in root:
+            moves.insert(0, (_COLORS[key], root[key][0]))
+    return {'properties': root, 'moves': moves}
+
+
+def _expand_points(values: List[str], size: int) -> List[Tuple[int, int]]:
+    """展开AB/AW的坐标列表，支持 'aa:cc' 形式的矩形压缩写法"""
+    points = []
+    for value in values:
+        if ':' in value:
+            start, end = value.split(':', 1)
+            (x1, y1), (x2, y2) = _decode_point(start, size), _decode_point(end, size)
+            points.extend((x, y) for y in range(min(y1, y2), max(y1, y2) + 1)
+                          for x in range(min(x1, x2), max(x1, x2) + 1))
+        else:
+            point = _decode_point(value, size)
+            if point is not None:
+                points.append(point)
+    return points
+
+
+def replay(game: Dict, engine: str = "list", superko: bool = False) -> GoBoard:
+    """把 iter_games 解析出的一盘棋重放为GoBoard；棋盘大小超出范围或着手不合法时抛出ValueError"""
+    props = game['properties']
+    value = props.get('SZ', ['19'])[0].split(':')[0].strip()
+    if not value.isdigit() or not MIN_SIZE <= int(value) <= MAX_SIZE:
+        raise ValueError(f"不支持的棋盘大小: SZ[{value}]（应为{MIN_SIZE}到{MAX_SIZE}）")
+    size = int(value)
+    board = GoBoard(size, superko=superko, engine=engine)
+    board.komi = float(props['KM'][0]) if props.get('KM', [''])[0] else KOMI
+
+    black = _expand_points(props.get('AB', []), size)
+    white = _expand_points(props.get('AW', []), size)
+    if black or white:
+        player = _COLORS.get(props.get('PL', [''])[0].upper())
+        if player is None:
+            # 未指定行棋方时，看第一手；有让子且没有着手时默认白先
+            player = game['moves'][0][0] if game['moves'] else (WHITE if black and not white else BLACK)
+        board.setup_position(black, white, player)
+
+    for number, (color, value) in enumerate(game['moves'], 1):
+        point = _decode_point(value, size)
+        # SGF允许同一方连走（如死活题），虚着和落子都按棋谱上的颜色记录
+        if point is None:
+            board.current_player = color
+            board.pass_move()
+            continue
+        if not board.is_valid_move(*point, player=color):
+            raise ValueError(f"第{number}手不合法: {value}")
+        board._play(board.index(*point), color)
+    return board
+
+
+def load_games(stream: TextIO, engine: str = "list", superko: bool = False) -> Iterator[GoBoard]:
+    """逐盘读取SGF合集并重放为GoBoard"""
+    for game in iter_games(stream):
+        yield replay(game, engine, superko)
@@ -0,0 +1,144 @@
+"""
+对称规范化缓存
+开局局面在不同对局中反复出现，只是方向不同（8种旋转/翻转）。
+以 GoBoard.canonical_key 为键缓存与落点相关的结果，落点换算到规范方向存放，
+读取时再换算回当前局面的方向，这样一个条目能服务全部8种对称形式。
+
+AI评估的分析文本（只含 (x,y) 坐标，从1开始）在方向不同的局面读取时随之换算；
+落子选择的解释是大模型生成的自由文本，只在方向相同时复用。
+"""
+
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from .board_tables import inverse_symmetry, transform_point
+from .go_board import GoBoard
+
+# 缓存中最多存放的结果条数（各局面的落点结果和落子选择合计），按条数而不是局面数限制内存
+_CACHE_LIMIT = 20000
+_COORDINATE = re.compile(r'\((\d+),(\s*)(\d+)\)')
+
+
+def transform_text(text: str, size: int, symmetry: int) -> str:
+    """把文本中的 (x,y) 坐标（从1开始）做第symmetry种对称变换，超出棋盘的数字对不变"""
+    if not symmetry:
+        return text
+
+    def replace(match):
+        x, y = int(match.group(1)) - 1, int(match.group(3)) - 1
+        if not (0 <= x < size and 0 <= y < size):
+            return match.group(0)
+        x, y = transform_point(x, y, size, symmetry)
+        return f"({x+1},{match.group(2)}{y+1})"
+
+    return _COORDINATE.sub(replace, text)
+
+
+class SymmetricView:
+    """
+    某个局面在缓存中的条目，按该局面自己的方向读写坐标和文本
+
+    落点按规范方向的一维索引存放；文本保持写入者的方向，连同写入者的变换编号一起存放，
+    只有方向不同的局面读取时才改写坐标
+    """
+
+    __slots__ = ('_entry', '_cache', '_cache_key', 'size', 'symmetry', '_tables', '_to_canonical')
+
+    def __init__(self, entry: Dict, cache: 'SymmetricCache', cache_key: Tuple, board: GoBoard, symmetry: int):
+        self._entry = entry
+        self._cache = cache
+        self._cache_key = cache_key
+        self.size = board.size
+        self.symmetry = symmetry  # 当前局面 -> 规范方向的变换
+        self._tables = board.tables
+        self._to_canonical = board.tables.symmetries[symmetry]
+
+    def _key(self, x: int, y: int) -> int:
+        return self._to_canonical[(y + 1) * self._tables.stride + x + 1]
+
+    def get(self, x: int, y: int) -> Optional[Tuple[Any, Optional[str]]]:
+        """读取落点(x, y)的 (结果, 文本)，没有缓存时返回None"""
+        value = self._entry.get(self._key(x, y))
+        if value is None:
+            return None
+        result, text, writer = value
+        return result, self._restore(text, writer)
+
+    def put(self, x: int, y: int, result: Any, text: Optional[str] = None):
+        """缓存落点(x, y)的结果和文本"""
+        self._store(self._key(x, y), (result, text, self.symmetry))
+
+    def get_choice(self) -> Optional[Tuple[int, int, Optional[str]]]:
+        """
+        读取缓存的落子选择 (x, y, 解释)
+
+        落点按当前方向换算；解释是自由文本（方位词、其他坐标写法无法换算），
+        只在写入者与当前局面方向相同时返回，否则为None，由调用方重新生成
+        """
+        choice = self._entry.get(None)
+        if choice is None:
+            return None
+        canonical, text, writer = choice
+        back = self._tables.symmetries[inverse_symmetry(self.symmetry)]
+        x, y = self._tables.coords[back[canonical]]
+        return x, y, text if writer == self.symmetry else None
+
+    def put_choice(self, x: int, y: int, text: str):
+        """缓存落子选择及其解释"""
+        self._store(None, (self._key(x, y), text, self.symmetry))
+
+    def _store(self, key, value):
+        if key not in self._entry:
+            self._cache._added(self._cache_key, self._entry)
+        self._entry[key] = value
+
+    def _restore(self, text: Optional[str], writer: int) -> Optional[str]:
+        """把写入者方向的文本换算到当前局面的方向"""
+        if text is None or writer == self.symmetry:
+            return text
+        canonical = transform_text(text, self.size, writer)
+        return transform_text(canonical, self.size, inverse_symmetry(self.symmetry))
+
+
+class SymmetricCache:
+    """按对称规范化局面存放的缓存，存放的结果条数超过limit时整体清空"""
+
+    __slots__ = ('limit', '_entries', '_stored')
+
+    def __init__(self, limit: int = _CACHE_LIMIT):
+        self.limit = limit
+        self._entries: Dict[Tuple, Dict] = {}
+        self._stored = 0
+
+    def view(self, board: GoBoard, *extra) -> SymmetricView:
+        """
+        取局面对应的条目（不存在时新建）
+
+        extra为结果还依赖的其他条件（行棋方、难度等），一并作为键
+        """
+        key, symmetry = board.canonical_key()
+        key = (board.size, key) + extra
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = {}
+        return SymmetricView(entry, self, key, board, symmetry)
+
+    def _added(self, key: Tuple, entry: Dict):
+        """条目entry新存入一条结果；超过上限时清空（已经脱离缓存的条目不再计数）"""
+        if self._entries.get(key) is not entry:
+            return
+        self._stored += 1
+        if self._stored > self.limit:
+            self.clear()
+
+    def clear(self):
+        self._entries.clear()
+        self._stored = 0
+
+    @property
+    def stored(self) -> int:
+        """当前存放的结果条数"""
+        return self._stored
+
+    def __len__(self) -> int:
+        return len(self._entries)
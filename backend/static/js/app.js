@@ -467,6 +467,7 @@ function SetupPanel({ onStart }) {
                     <option value="easy">简单（适合初学者）</option>
                     <option value="medium">中等（有一定基础）</option>
                     <option value="hard">困难（高水准挑战）</option>
+                    <option value="mcts">树搜索（每步约2秒）</option>
                 </select>
             </div>
 